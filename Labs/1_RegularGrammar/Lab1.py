@@ -1,4 +1,52 @@
 import random
+from array import array
+from itertools import islice
+
+def hopcroft(rows, accepting, symbol_count):
+    # rows[q][a] is the next state or -1. Missing moves go to an extra dead state
+    # n, and the result maps every state (dead included) to its block.
+    n = len(rows)
+    dead = n
+    inverse = [[[] for _ in range(n + 1)] for _ in range(symbol_count)]
+    for q, row in enumerate(rows):
+        for a, r in enumerate(row):
+            inverse[a][dead if r < 0 else r].append(q)
+    for a in range(symbol_count):
+        inverse[a][dead].append(dead)
+
+    finals = {q for q in range(n) if accepting[q]}
+    others = set(range(n + 1)) - finals
+    blocks = [block for block in (finals, others) if block]
+    block_of = [0] * (n + 1)
+    for i, block in enumerate(blocks):
+        for q in block:
+            block_of[q] = i
+    waiting = set()
+    if len(blocks) == 2:
+        smaller = 0 if len(blocks[0]) <= len(blocks[1]) else 1
+        waiting = {(smaller, a) for a in range(symbol_count)}
+
+    while waiting:
+        splitter, a = waiting.pop()
+        touched = {}
+        for q in blocks[splitter]:
+            for p in inverse[a][q]:
+                touched.setdefault(block_of[p], []).append(p)
+        for b, moved in touched.items():
+            if len(moved) == len(blocks[b]):
+                continue
+            moved = set(moved)
+            blocks[b] -= moved
+            new = len(blocks)
+            blocks.append(moved)
+            for p in moved:
+                block_of[p] = new
+            for c in range(symbol_count):
+                if (b, c) in waiting or len(moved) <= len(blocks[b]):
+                    waiting.add((new, c))
+                else:
+                    waiting.add((b, c))
+    return block_of
 
 class Grammar:
     def __init__(self, VN, VT, P, S):
@@ -6,33 +54,357 @@ class Grammar:
         self.VT = VT
         self.P = P
         self.S = S
+        self.counts = None
+        self.choices = None
+
+    def buildLengths(self):
+        # For every nonterminal the shortest string it derives and, among derivations
+        # of that length, the smallest height (a least fixed point). Each production is
+        # stored reversed for the derivation stack, with how much it raises the
+        # shortest completion of the sentential form; the finishing ones keep the
+        # length minimal and lower the height, so using only them always terminates.
+        productions = [(head, tuple(rule)) for head, rules in self.P.items() for rule in rules]
+        best = {A: (float('inf'), float('inf')) for A in self.VN}
+        best.update((head, (float('inf'), float('inf'))) for head, _ in productions)
+
+        def measure(rule):
+            length, height = 0, 0
+            for symbol in rule:
+                if symbol in best:
+                    length += best[symbol][0]
+                    height = max(height, best[symbol][1])
+                else:
+                    length += 1
+            return length, height + 1
+
+        changed = True
+        while changed:
+            changed = False
+            for head, rule in productions:
+                measured = measure(rule)
+                if measured < best[head]:
+                    best[head] = measured
+                    changed = True
+
+        self.minimum = {A: best[A][0] for A in best}
+        self.choices = {A: [] for A in best}
+        self.finishing = {A: [] for A in best}
+        for head, rule in productions:
+            length, height = measure(rule)
+            if length == float('inf'):
+                continue
+            choice = (rule[::-1], length - best[head][0])
+            self.choices[head].append(choice)
+            if choice[1] == 0 and height <= best[head][1]:
+                self.finishing[head].append(choice)
+        self.widest = {A: max((increase for _, increase in rules), default=0) for A, rules in self.choices.items()}
+
+    def generateString(self, max_length=None, rng=random):
+        # One leftmost derivation with the pending symbols on a stack, so each step
+        # costs the length of the production used. Productions that cannot reach a
+        # terminal string are never chosen. With max_length, a production is only
+        # chosen if the shortest completion still fits, and once there is no room
+        # left only finishing productions are used.
+        if self.choices is None:
+            self.buildLengths()
+        choices = self.choices
+        finishing = self.finishing
+        widest = self.widest
+        committed = self.minimum[self.S]
+        if committed == float('inf'):
+            raise ValueError(f"{self.S} derives no terminal string")
+        if max_length is not None and committed > max_length:
+            raise ValueError(f"The shortest string derived from {self.S} is longer than {max_length}")
+        choice = rng.choice
+        output = []
+        stack = [self.S]
+        while stack:
+            symbol = stack.pop()
+            rules = choices.get(symbol)
+            if rules is None:
+                output.append(symbol)
+                continue
+            if max_length is None:
+                rule, _ = choice(rules)
+            else:
+                slack = max_length - committed
+                if not slack:
+                    rule, _ = choice(finishing[symbol])
+                else:
+                    if slack < widest[symbol]:
+                        rules = [r for r in rules if r[1] <= slack]
+                    rule, increase = choice(rules)
+                    committed += increase
+            stack.extend(rule)
+        return ''.join(output)
+
+    def generateStrings(self, count=None, max_length=None, seed=None):
+        # Yields count strings, or an endless stream when count is None.
+        rng = random.Random(seed)
+        generate = self.generateString
+        if count is None:
+            while True:
+                yield generate(max_length, rng)
+        for _ in range(count):
+            yield generate(max_length, rng)
+
+    def writeStrings(self, file, count, max_length=None, seed=None, batch_size=10_000):
+        # Streams count strings, one per line, to a text file in batches.
+        strings = self.generateStrings(count, max_length, seed)
+        remaining = count
+        while remaining > 0:
+            batch = min(batch_size, remaining)
+            file.write('\n'.join(islice(strings, batch)) + '\n')
+            remaining -= batch
+        return count
+
+    def buildCounts(self):
+        # counts[A][n] is the number of derivations of length-n strings from A, and
+        # suffixes[(p, i)][n] the same for symbols i.. of production p. Both grow one
+        # length at a time in extendCounts() and are kept for later calls. Unit
+        # productions are handled in dependency order; ε-productions and unit cycles
+        # would give infinitely many derivations and are rejected.
+        productions = []
+        by_head = {A: [] for A in self.VN}
+        for head, rules in self.P.items():
+            for rule in rules:
+                rule = tuple(rule)
+                if not rule:
+                    raise ValueError(f"{head} has an ε-production, counting needs non-empty productions")
+                by_head.setdefault(head, []).append(len(productions))
+                productions.append((head, rule))
+
+        order = []
+        visited = set()
+        for root in by_head:
+            if root in visited:
+                continue
+            visited.add(root)
+            path = {root}
+            stack = [(root, iter(by_head[root]))]
+            while stack:
+                A, pending = stack[-1]
+                for p in pending:
+                    rule = productions[p][1]
+                    B = rule[0]
+                    if len(rule) == 1 and B in by_head:
+                        if B in path:
+                            raise ValueError(f"Unit productions through {B} form a cycle")
+                        if B not in visited:
+                            visited.add(B)
+                            path.add(B)
+                            stack.append((B, iter(by_head[B])))
+                            break
+                else:
+                    stack.pop()
+                    path.discard(A)
+                    order.append(A)
+
+        self.productions = productions
+        self.by_head = by_head
+        self.order = order
+        self.counts = {A: [0] for A in by_head}
+        self.suffixes = {(p, i): [0] for p, (_, rule) in enumerate(productions) for i in range(len(rule))}
+        self.counted = 0
+
+    def symbolCount(self, symbol, length):
+        counts = self.counts.get(symbol)
+        if counts is None:
+            return 1 if length == 1 else 0
+        return counts[length]
+
+    def splits(self, p, i, length):
+        # (m, weight) for each length m of symbol i of p, the rest of p deriving length - m
+        symbol = self.productions[p][1][i]
+        rest = self.suffixes[(p, i + 1)]
+        if symbol not in self.counts:
+            return [(1, rest[length - 1])] if length > 1 else []
+        counts = self.counts[symbol]
+        return [(m, counts[m] * rest[length - m]) for m in range(1, length)]
+
+    def suffixCount(self, p, i, length):
+        rule = self.productions[p][1]
+        if i == len(rule) - 1:
+            return self.symbolCount(rule[i], length)
+        return sum(weight for _, weight in self.splits(p, i, length))
+
+    def extendCounts(self, length):
+        if self.counts is None:
+            self.buildCounts()
+        for n in range(self.counted + 1, length + 1):
+            # whole productions only need the rest of the rule at shorter lengths, so
+            # heads go first and the suffixes after the first symbol follow
+            for A in self.order:
+                total = 0
+                for p in self.by_head[A]:
+                    weight = self.suffixCount(p, 0, n)
+                    self.suffixes[(p, 0)].append(weight)
+                    total += weight
+                self.counts[A].append(total)
+            for p, (_, rule) in enumerate(self.productions):
+                for i in range(len(rule) - 1, 0, -1):
+                    self.suffixes[(p, i)].append(self.suffixCount(p, i, n))
+            self.counted = n
+
+    def countStrings(self, length, symbol=None):
+        # Derivations of strings of exactly this length, which is the number of such
+        # strings when the grammar is unambiguous.
+        if length < 1:
+            return 0
+        self.extendCounts(length)
+        return self.symbolCount(self.S if symbol is None else symbol, length)
+
+    def sampleString(self, length, rng=random):
+        # A uniformly random derivation of a string of exactly this length. Tasks are
+        # (symbol, None, n) or (i, p, n) for symbols i.. of production p.
+        if not self.countStrings(length):
+            raise ValueError(f"The grammar derives no string of length {length}")
+        output = []
+        tasks = [(self.S, None, length)]
+        while tasks:
+            symbol, p, n = tasks.pop()
+            if p is None:
+                if symbol not in self.counts:
+                    output.append(symbol)
+                    continue
+                choices = [(q, self.suffixes[(q, 0)][n]) for q in self.by_head[symbol]]
+            else:
+                rule = self.productions[p][1]
+                if symbol == len(rule) - 1:
+                    tasks.append((rule[symbol], None, n))
+                    continue
+                choices = self.splits(p, symbol, n)
+            if len(choices) == 1:
+                chosen = choices[0][0]
+            else:
+                pick = rng.randrange(sum(weight for _, weight in choices))
+                for chosen, weight in choices:
+                    if pick < weight:
+                        break
+                    pick -= weight
+            if p is None:
+                tasks.append((0, chosen, n))
+            else:
+                tasks.append((symbol + 1, p, n - chosen))
+                tasks.append((rule[symbol], None, chosen))
+        return ''.join(output)
 
-    def generateString(self):
-        gen_string = self.S
-        while gen_string[-1] in self.VN:
-            for i, symbol in enumerate(gen_string):
-                if symbol in self.VN:
-                    repl = random.choice(self.P[symbol])
-                    gen_string = gen_string[:i] + repl + gen_string[i+1:]
+    def longestString(self):
+        # Length of the longest derivable string, or None when the language is
+        # infinite. Only productions that can finish are followed from the start
+        # symbol; with ε-productions and unit cycles ruled out, any cycle among them
+        # pumps the length without bound.
+        if self.counts is None:
+            self.buildCounts()
+        if self.choices is None:
+            self.buildLengths()
+        rules = {A: [] for A in self.counts}
+        for head, rule in self.productions:
+            if all(self.minimum.get(symbol, 1) < float('inf') for symbol in rule):
+                rules[head].append(rule)
+        successors = {A: {symbol for rule in rules[A] for symbol in rule if symbol in rules} for A in rules}
+
+        longest = {}
+        path = {self.S}
+        stack = [(self.S, iter(successors[self.S]))]
+        while stack:
+            A, pending = stack[-1]
+            for B in pending:
+                if B in path:
+                    return None
+                if B not in longest:
+                    path.add(B)
+                    stack.append((B, iter(successors[B])))
                     break
-        print(gen_string)
+            else:
+                stack.pop()
+                path.discard(A)
+                longest[A] = max((sum(longest.get(symbol, 1) for symbol in rule) for rule in rules[A]), default=0)
+        return longest[self.S]
+
+    def enumerateStrings(self, max_length=None):
+        # Every derivable string, shortest first. Only branches with a non-zero count
+        # are followed, so no work is spent on dead ends; strings with several
+        # derivations are reported once. A finite language ends after its longest string.
+        longest = self.longestString()
+        if longest is not None and (max_length is None or longest < max_length):
+            max_length = longest
+        length = 1
+        while max_length is None or length <= max_length:
+            if self.countStrings(length):
+                seen = set()
+                for string in self.enumerateLength(length):
+                    if string not in seen:
+                        seen.add(string)
+                        yield string
+            length += 1
+
+    def enumerateLength(self, length):
+        # Depth first over derivations. The pending tasks of a branch are a linked list
+        # (task, rest) and the output so far a linked list (rest, symbol), so branches
+        # share them instead of copying.
+        stack = [(None, ((self.S, None, length), None))]
+        while stack:
+            output, tasks = stack.pop()
+            while tasks is not None and tasks[0][1] is None and tasks[0][0] not in self.counts:
+                output = (output, tasks[0][0])
+                tasks = tasks[1]
+            if tasks is None:
+                symbols = []
+                while output is not None:
+                    output, symbol = output
+                    symbols.append(symbol)
+                yield ''.join(reversed(symbols))
+                continue
+            (symbol, p, n), rest = tasks
+            branches = []
+            if p is None:
+                for q in self.by_head[symbol]:
+                    if self.suffixes[(q, 0)][n]:
+                        branches.append(((0, q, n), rest))
+            elif symbol == len(self.productions[p][1]) - 1:
+                branches.append(((self.productions[p][1][symbol], None, n), rest))
+            else:
+                for m, weight in self.splits(p, symbol, n):
+                    if weight:
+                        branches.append(((self.productions[p][1][symbol], None, m), ((symbol + 1, p, n - m), rest)))
+            for branch in reversed(branches):
+                stack.append((output, branch))
 
     def toFiniteAutomaton(self):
-        Q = self.VN | {"q_accept"}
+        # Productions are strings of one-character symbols or, for longer names, lists
+        # of symbols; either way A -> a goes to the accepting state and A -> aB to B.
+        accept = "q_accept"
+        while accept in self.VN:
+            accept += "'"
+        Q = self.VN | {accept}
         sigma = self.VT
         delta = {}
         q0 = self.S
-        F = {"q_accept"}
+        F = {accept}
 
         for non_terminal, productions in self.P.items():
             for production in productions:
-                if len(production) == 1 and production in self.VT:
-                    delta[(non_terminal, production)] = "q_accept"
+                if isinstance(production, str) and production in self.VT:
+                    production = [production]
+                symbols = tuple(production)
+                if len(symbols) == 1 and symbols[0] in self.VT:
+                    delta[(non_terminal, symbols[0])] = accept
+                elif len(symbols) == 2 and symbols[0] in self.VT and symbols[1] in self.VN:
+                    delta[(non_terminal, symbols[0])] = symbols[1]
                 else:
-                    delta[(non_terminal, production[0])] = production[1:]
+                    raise ValueError(f"{non_terminal} -> {production} is not of the form a or aB")
 
         return FiniteAutomaton(Q, sigma, delta, q0, F)
 
+class SymbolIndex(dict):
+    def __init__(self, mapping, unknown):
+        super().__init__(mapping)
+        self.unknown = unknown
+
+    def __missing__(self, key):
+        return self.unknown
+
 class FiniteAutomaton:
     def __init__(self, Q, sigma, delta, q0, F):
         self.Q = Q
@@ -40,8 +412,136 @@ class FiniteAutomaton:
         self.delta = delta
         self.q0 = q0
         self.F = F
+        self.table = None
+
+    def compile(self):
+        states = sorted(set(self.Q) | {state for state, _ in self.delta} | set(self.delta.values()) | {self.q0})
+        symbols = sorted(set(self.sigma) | {symbol for _, symbol in self.delta})
+        if any(len(symbol) != 1 for symbol in symbols):
+            raise ValueError("compile() needs single-character symbols")
+        if len(symbols) > 255:
+            raise ValueError("compile() supports at most 255 symbols")
+
+        # Row 0 is the dead state and the last column catches symbols outside sigma.
+        # Entries hold the offset of the next row, so a step is a single index.
+        stride = len(symbols) + 1
+        state_ids = {state: i + 1 for i, state in enumerate(states)}
+        symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+        table = array('i', bytes(4 * stride * (len(states) + 1)))
+        for (state, symbol), next_state in self.delta.items():
+            table[state_ids[state] * stride + symbol_ids[symbol]] = state_ids[next_state] * stride
+
+        self.states = states
+        self.symbols = symbols
+        self.stride = stride
+        self.table = table
+        self.start = state_ids[self.q0] * stride
+        self.accepting = frozenset(state_ids[state] * stride for state in self.F if state in state_ids)
+        self.symbol_index = SymbolIndex({ord(symbol): chr(i) for symbol, i in symbol_ids.items()}, chr(len(symbols)))
+        return self
+
+    def minimize(self):
+        outgoing = {}
+        for (state, symbol), next_state in self.delta.items():
+            outgoing.setdefault(state, []).append((symbol, next_state))
+        states = [self.q0]
+        state_ids = {self.q0: 0}
+        for state in states:
+            for _, next_state in outgoing.get(state, []):
+                if next_state not in state_ids:
+                    state_ids[next_state] = len(states)
+                    states.append(next_state)
+
+        symbols = sorted(set(self.sigma) | {symbol for _, symbol in self.delta})
+        symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+        rows = [[-1] * len(symbols) for _ in states]
+        for state in states:
+            for symbol, next_state in outgoing.get(state, []):
+                rows[state_ids[state]][symbol_ids[symbol]] = state_ids[next_state]
+        accepting = [state in self.F for state in states]
+
+        # Each block is named after its first state in breadth-first order.
+        block_of = hopcroft(rows, accepting, len(symbols))
+        dead_block = block_of[len(states)]
+        names = {}
+        for q, state in enumerate(states):
+            names.setdefault(block_of[q], state)
+        delta = {}
+        for q, row in enumerate(rows):
+            for symbol, next_state in zip(symbols, row):
+                if next_state >= 0 and block_of[next_state] != dead_block:
+                    delta[(names[block_of[q]], symbol)] = names[block_of[next_state]]
+
+        Q = {name for block, name in names.items() if block != dead_block} | {self.q0}
+        F = {names[block_of[q]] for q in range(len(states)) if accepting[q]}
+        return FiniteAutomaton(Q, set(self.sigma), delta, self.q0, F)
+
+    def acceptsMany(self, strings):
+        if self.table is None:
+            self.compile()
+        table = self.table.tolist()
+        start = self.start
+        accepting = self.accepting
+        symbol_index = self.symbol_index
+        results = []
+        append = results.append
+        for input_string in strings:
+            state = start
+            for symbol in input_string.translate(symbol_index).encode('latin-1'):
+                state = table[state + symbol]
+                if not state:
+                    break
+            append(state in accepting)
+        return results
+
+    def acceptsBatch(self, strings):
+        import numpy as np
+
+        if self.table is None:
+            self.compile()
+        stride = self.stride
+        rows = len(self.table) // stride
+        transitions = np.asarray(self.table, dtype=np.int32).reshape(rows, stride) // stride
+        accepting = np.zeros(rows, dtype=bool)
+        accepting[[offset // stride for offset in self.accepting]] = True
+
+        strings = strings.tolist() if isinstance(strings, np.ndarray) else list(strings)
+        count = len(strings)
+        lengths = np.fromiter(map(len, strings), dtype=np.int64, count=count)
+        symbols = np.frombuffer(''.join(strings).translate(self.symbol_index).encode('latin-1'), dtype=np.uint8)
+        states = np.full(count, self.start // stride, dtype=np.int32)
+        if count == 0:
+            return accepting[states]
+
+        width = int(lengths.max())
+        if width == lengths.min():
+            matrix = symbols.reshape(count, width)
+            for column in np.ascontiguousarray(matrix.T):
+                states = transitions[states, column]
+            return accepting[states]
+
+        # Padded batch: sort by length so the strings still running at column j
+        # are a prefix of the batch and finished ones are never touched again.
+        order = np.argsort(-lengths, kind='stable')
+        starts = (np.cumsum(lengths) - lengths)[order]
+        running = len(lengths) - np.searchsorted(np.sort(lengths), np.arange(width), side='right')
+        for column in range(width):
+            active = running[column]
+            states[:active] = transitions[states[:active], symbols[starts[:active] + column]]
+        results = np.empty(count, dtype=bool)
+        results[order] = accepting[states]
+        return results
 
     def stringBelongToLanguage(self, input_string):
+        if self.table is not None:
+            state = self.start
+            table = self.table
+            for symbol in input_string.translate(self.symbol_index).encode('latin-1'):
+                state = table[state + symbol]
+                if not state:
+                    return False
+            return state in self.accepting
+
         current_state = self.q0
         for symbol in input_string:
             if (current_state, symbol) in self.delta:
@@ -62,7 +562,7 @@ def main():
 
     grammar = Grammar(VN, VT, P, S)
     for i in range(5):
-        grammar.generateString()
+        print(grammar.generateString())
     fa = grammar.toFiniteAutomaton()
     print("\nFinite Automaton:")
     print(fa.Q)
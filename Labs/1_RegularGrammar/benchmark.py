@@ -0,0 +1,111 @@
+import importlib.util
+import io
+import random
+import sys
+import time
+
+from Lab1 import FiniteAutomaton, Grammar
+
+def build_grammar():
+    VN = {"S", "B", "C"}
+    VT = {"a", "b", "c"}
+    P = {
+        "S": ["aB"],
+        "B": ["aC", "bB"],
+        "C": ["bB", "c", "aS"]
+    }
+    return Grammar(VN, VT, P, "S")
+
+def derive(grammar, rng):
+    symbols = []
+    state = grammar.S
+    while state:
+        production = rng.choice(grammar.P[state])
+        symbols.append(production[0])
+        state = production[1:]
+    return ''.join(symbols)
+
+def workload(grammar, count, seed=0):
+    # Half the strings are derived from the grammar, the other half are random
+    # strings that are mostly rejected after a few symbols.
+    rng = random.Random(seed)
+    strings = []
+    for i in range(count):
+        if i % 2:
+            strings.append(''.join(rng.choice("abc") for _ in range(rng.randint(4, 16))))
+        else:
+            strings.append(derive(grammar, rng))
+    return strings
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def sampling(count):
+    # Count table for long strings, then uniform samples and exhaustive enumeration
+    grammar = build_grammar()
+    _, table_time = timed(grammar.countStrings, 1000)
+    print(f"\ncount table up to length 1,000 {table_time:8.3f} s")
+    rng = random.Random(2)
+    for length in (10, 100, 1000):
+        number = max(count // length, 100)
+        samples, sample_time = timed(lambda: [grammar.sampleString(length, rng) for _ in range(number)])
+        assert all(len(s) == length for s in samples)
+        print(f"{f'sampleString({length})':<22} {sample_time:8.3f} s {number / sample_time:>14,.0f} strings/s")
+    strings, enumerate_time = timed(lambda: list(grammar.enumerateStrings(24)))
+    assert len(strings) == sum(grammar.countStrings(n) for n in range(1, 25))
+    print(f"{'enumerateStrings(24)':<22} {enumerate_time:8.3f} s {len(strings) / enumerate_time:>14,.0f} strings/s")
+
+def generation(count):
+    # Streaming derivations written to an in-memory file, with and without a cap
+    grammar = build_grammar()
+    fa = grammar.toFiniteAutomaton()
+    for max_length in (None, 16, 256):
+        file = io.StringIO()
+        _, write_time = timed(grammar.writeStrings, file, count, max_length, 0)
+        strings = file.getvalue().split()
+        assert len(strings) == count and all(fa.stringBelongToLanguage(s) for s in strings[:1000])
+        assert max_length is None or max(map(len, strings)) <= max_length
+        label = f"writeStrings, max {max_length}"
+        print(f"{label:<22} {write_time:8.3f} s {count / write_time * 60:>14,.0f} strings/min")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    grammar = build_grammar()
+    strings = workload(grammar, count)
+    fa = grammar.toFiniteAutomaton()
+    compiled = FiniteAutomaton(fa.Q, fa.sigma, fa.delta, fa.q0, fa.F).compile()
+
+    expected, dict_time = timed(lambda: [fa.stringBelongToLanguage(s) for s in strings])
+    single, single_time = timed(lambda: [compiled.stringBelongToLanguage(s) for s in strings])
+    batch, batch_time = timed(compiled.acceptsMany, strings)
+    assert expected == single == batch
+
+    print(f"{count:,} strings, {sum(expected):,} accepted")
+    print(f"{'dict lookup':<22} {dict_time:8.3f} s {count / dict_time:>14,.0f} strings/s")
+    print(f"{'compiled, per string':<22} {single_time:8.3f} s {count / single_time:>14,.0f} strings/s")
+    print(f"{'compiled, acceptsMany':<22} {batch_time:8.3f} s {count / batch_time:>14,.0f} strings/s")
+
+    sampling(count)
+    print()
+    generation(count)
+
+    if importlib.util.find_spec("numpy") is None:
+        print("numpy is not installed, skipping acceptsBatch")
+        return
+    vectorized, vectorized_time = timed(compiled.acceptsBatch, strings)
+    assert expected == vectorized.tolist()
+    print(f"{'numpy, acceptsBatch':<22} {vectorized_time:8.3f} s {count / vectorized_time:>14,.0f} strings/s")
+
+    rng = random.Random(1)
+    fixed = [''.join(rng.choice("abc") for _ in range(12)) for _ in range(count)]
+    expected, batch_time = timed(compiled.acceptsMany, fixed)
+    vectorized, vectorized_time = timed(compiled.acceptsBatch, fixed)
+    assert expected == vectorized.tolist()
+    print(f"\n{count:,} random strings of length 12")
+    print(f"{'compiled, acceptsMany':<22} {batch_time:8.3f} s {count / batch_time:>14,.0f} strings/s")
+    print(f"{'numpy, acceptsBatch':<22} {vectorized_time:8.3f} s {count / vectorized_time:>14,.0f} strings/s")
+
+if __name__ == "__main__":
+    main()
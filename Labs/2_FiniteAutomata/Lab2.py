@@ -1,3 +1,190 @@
+import logging
+import sys
+from collections import OrderedDict
+
+EPSILON = "ε"
+
+logger = logging.getLogger(__name__)
+
+def stateName(index):
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+def ruleSymbols(rule, nonterminals):
+    # Rules are lists of symbols, as in Lab5, or strings of one-character symbols.
+    if isinstance(rule, str):
+        return [rule] if rule in nonterminals else list(rule)
+    return list(rule)
+
+class SymbolTable:
+    # Names to dense integer ids and back, numbered in the order they are first seen.
+    # fresh() never hands out a reserved name, e.g. a terminal of the same grammar.
+    def __init__(self, names=(), reserved=()):
+        self.names = []
+        self.ids = {}
+        self.reserved = frozenset(reserved)
+        self.unused = 0
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name):
+        symbol_id = self.ids.get(name)
+        if symbol_id is None:
+            symbol_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol_id
+
+    def fresh(self):
+        # A new name of the form stateName(i) that is neither in the table nor reserved.
+        name = stateName(self.unused)
+        while name in self.ids or name in self.reserved:
+            self.unused += 1
+            name = stateName(self.unused)
+        self.intern(name)
+        return name
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __len__(self):
+        return len(self.names)
+
+def iterBits(mask):
+    digits = bin(mask)[:1:-1]
+    position = digits.find("1")
+    while position >= 0:
+        yield position
+        position = digits.find("1", position + 1)
+
+def hopcroft(rows, accepting, symbol_count):
+    # rows[q][a] is the next state or -1. Missing moves go to an extra dead state
+    # n, and the result maps every state (dead included) to its block.
+    n = len(rows)
+    dead = n
+    inverse = [[[] for _ in range(n + 1)] for _ in range(symbol_count)]
+    for q, row in enumerate(rows):
+        for a, r in enumerate(row):
+            inverse[a][dead if r < 0 else r].append(q)
+    for a in range(symbol_count):
+        inverse[a][dead].append(dead)
+
+    finals = {q for q in range(n) if accepting[q]}
+    others = set(range(n + 1)) - finals
+    blocks = [block for block in (finals, others) if block]
+    block_of = [0] * (n + 1)
+    for i, block in enumerate(blocks):
+        for q in block:
+            block_of[q] = i
+    waiting = set()
+    if len(blocks) == 2:
+        smaller = 0 if len(blocks[0]) <= len(blocks[1]) else 1
+        waiting = {(smaller, a) for a in range(symbol_count)}
+
+    while waiting:
+        splitter, a = waiting.pop()
+        touched = {}
+        for q in blocks[splitter]:
+            for p in inverse[a][q]:
+                touched.setdefault(block_of[p], []).append(p)
+        for b, moved in touched.items():
+            if len(moved) == len(blocks[b]):
+                continue
+            moved = set(moved)
+            blocks[b] -= moved
+            new = len(blocks)
+            blocks.append(moved)
+            for p in moved:
+                block_of[p] = new
+            for c in range(symbol_count):
+                if (b, c) in waiting or len(moved) <= len(blocks[b]):
+                    waiting.add((new, c))
+                else:
+                    waiting.add((b, c))
+    return block_of
+
+class LazyDfa:
+    def __init__(self, fa, max_bytes=1 << 24):
+        _, symbols, successors, start, final = fa.subsetTables()
+        self.symbol_ids = {symbol: a for a, symbol in enumerate(symbols)}
+        self.successors = successors
+        self.start = start
+        self.final = final
+        self.max_bytes = max_bytes
+        # A row is [next row's serial per symbol..., subset, serial], with None for a
+        # move not taken yet and 0 for the dead state. Links are serials rather than
+        # the rows themselves, so an evicted row is freed at once and max_bytes is a
+        # hard cap; a link to an evicted row misses in recency and is recomputed.
+        self.subset_index = len(symbols)
+        self.serial_index = len(symbols) + 1
+        self.list_bytes = sys.getsizeof([None] * (len(symbols) + 2))
+        self.rows = {}
+        self.recency = OrderedDict()
+        self.next_serial = 1
+        self.cached_bytes = 0
+        self.computed = 0
+        self.evictions = 0
+
+    def rowSize(self, subset):
+        # Rough cost of a cached row: its subset, the list and the two dictionary
+        # entries. The rows it links to are charged when they are cached.
+        return sys.getsizeof(subset) + self.list_bytes + 200
+
+    def row(self, subset):
+        row = self.rows.get(subset)
+        if row is not None:
+            self.recency.move_to_end(row[self.serial_index])
+            return row
+        size = self.rowSize(subset)
+        while self.recency and self.cached_bytes + size > self.max_bytes:
+            _, evicted = self.recency.popitem(last=False)
+            del self.rows[evicted[self.subset_index]]
+            self.cached_bytes -= self.rowSize(evicted[self.subset_index])
+            self.evictions += 1
+        row = [None] * self.subset_index + [subset, self.next_serial]
+        self.rows[subset] = row
+        self.recency[self.next_serial] = row
+        self.next_serial += 1
+        self.cached_bytes += size
+        return row
+
+    def step(self, row, a):
+        # The row after symbol a, or None for the dead state.
+        next_subset = 0
+        successor = self.successors[a]
+        for q in iterBits(row[self.subset_index]):
+            next_subset |= successor[q]
+        self.computed += 1
+        return self.row(next_subset) if next_subset else None
+
+    def stringBelongToLanguage(self, input_string):
+        symbol_ids = self.symbol_ids
+        serial_index = self.serial_index
+        cached = self.recency.get
+        touch = self.recency.move_to_end
+        row = self.row(self.start)
+        for symbol in input_string:
+            a = symbol_ids.get(symbol)
+            if a is None:
+                return False
+            serial = row[a]
+            if serial == 0:
+                return False
+            next_row = cached(serial) if serial is not None else None
+            if next_row is None:
+                next_row = self.step(row, a)
+                if next_row is None:
+                    row[a] = 0
+                    return False
+                row[a] = next_row[serial_index]
+            else:
+                touch(serial)
+            row = next_row
+        return bool(row[self.subset_index] & self.final)
+
 class Grammar:
     def __init__(self, VN, VT, P, S):
         self.VN = VN
@@ -11,15 +198,18 @@ class Grammar:
         is_context_sensitive = True
 
         for lhs, rhs_list in self.P.items():
+            head = ruleSymbols(lhs, self.VN)
+            single = len(head) == 1 and head[0] in self.VN
             for rhs in rhs_list:
-                if not (len(lhs) == 1 and lhs.isupper() and 
-                        (rhs.islower() or (len(rhs) == 2 and rhs[0].islower() and rhs[1].isupper()))):
+                body = ruleSymbols(rhs, self.VN)
+                if not (single and (all(symbol not in self.VN for symbol in body) or
+                                    (len(body) == 2 and body[0] not in self.VN and body[1] in self.VN))):
                     is_regular = False
 
-                if not (len(lhs) == 1 and lhs.isupper()):
+                if not single:
                     is_context_free = False
 
-                if len(lhs) > len(rhs):
+                if len(head) > len(body):
                     is_context_sensitive = False
 
         if is_regular:
@@ -31,17 +221,36 @@ class Grammar:
         else:
             return "Type 0 (Recursively Enumerable)"
 
-VN = {"S", "B", "C"}
-VT = {"a", "b", "c"}
-P = {
-    "S": ["aB"],
-    "B": ["aC", "bB"],
-    "C": ["bB", "c", "aS"]
-}
-S = "S"
-
-grammar = Grammar(VN, VT, P, S)
-print(grammar.classify())
+    def toFiniteAutomaton(self):
+        # One pass over a right-linear grammar. A -> a1..ak B becomes a chain of k
+        # moves ending in B and A -> a1..ak one ending in the accepting state, with
+        # fresh names for the states in between; A -> B is an ε-move and A -> ε makes
+        # A accepting. Symbols can be any strings when rules are lists of symbols.
+        table = SymbolTable([self.S, *sorted(self.VN)])
+        accept = table.fresh()
+        delta = {}
+        F = {accept}
+        terminals = set()
+        for head, rules in self.P.items():
+            for rule in rules:
+                body = [symbol for symbol in ruleSymbols(rule, self.VN) if symbol != EPSILON]
+                if body and body[-1] in self.VN:
+                    target = body.pop()
+                elif body:
+                    target = accept
+                else:
+                    F.add(head)
+                    continue
+                if not self.VN.isdisjoint(body):
+                    raise ValueError(f"{head} -> {rule} is not right-linear")
+                state = head
+                for symbol in body[:-1]:
+                    next_state = table.fresh()
+                    delta.setdefault(state, {}).setdefault(symbol, []).append(next_state)
+                    state = next_state
+                delta.setdefault(state, {}).setdefault(body[-1] if body else EPSILON, []).append(target)
+                terminals.update(body)
+        return FiniteAutomaton(set(table.names), terminals | set(self.VT), delta, self.S, F)
 
 class FiniteAutomaton:
     def __init__(self, Q, sigma, delta, q0, F):
@@ -59,80 +268,238 @@ class FiniteAutomaton:
         return True
 
     def convertToGrammar(self):
-        state_mapping = {state: chr(65 + i) for i, state in enumerate(sorted(self.Q))}
-        grammar_productions = {}
+        # States are numbered in one pass, the start state first, and named with
+        # stateName(), skipping names that are also input symbols, so any number of
+        # states gets distinct nonterminals. Rules are lists of symbols: [a, B] for a
+        # move and [ε] for a final state.
+        table = SymbolTable([self.q0])
+        intern = table.intern
+        for state, transitions in self.delta.items():
+            intern(state)
+            for next_states in transitions.values():
+                for next_state in next_states:
+                    intern(next_state)
+        for state in sorted(set(self.Q) | set(self.F), key=str):
+            intern(state)
+        alphabet = set(self.sigma)
+        for transitions in self.delta.values():
+            alphabet.update(transitions)
+        naming = SymbolTable(reserved=alphabet)
+        names = [naming.fresh() for _ in range(len(table))]
+        ids = table.ids
 
+        grammar_productions = {}
         for state, transitions in self.delta.items():
+            rules = grammar_productions.setdefault(names[ids[state]], [])
             for symbol, next_states in transitions.items():
                 for next_state in next_states:
-                    rule = f"{symbol}{state_mapping[next_state]}"
-                    if state_mapping[state] in grammar_productions:
-                        grammar_productions[state_mapping[state]].append(rule)
-                    else:
-                        grammar_productions[state_mapping[state]] = [rule]
-
+                    rules.append([symbol, names[ids[next_state]]])
         for final_state in self.F:
-            if state_mapping[final_state] in grammar_productions:
-                grammar_productions[state_mapping[final_state]].append("ε")
-            else:
-                grammar_productions[state_mapping[final_state]] = ["ε"]
+            grammar_productions.setdefault(names[ids[final_state]], []).append([EPSILON])
+
+        return set(names), set(self.sigma), grammar_productions, names[0]
+
+    def subsetTables(self):
+        states = sorted(set(self.Q) | set(self.delta) | {
+            next_state
+            for transitions in self.delta.values()
+            for next_states in transitions.values()
+            for next_state in next_states
+        } | {self.q0})
+        index = {state: i for i, state in enumerate(states)}
+        symbols = sorted({symbol for transitions in self.delta.values() for symbol in transitions} - {EPSILON} | set(self.sigma))
+
+        epsilon_edges = [[] for _ in states]
+        for state, transitions in self.delta.items():
+            for next_state in transitions.get(EPSILON, []):
+                epsilon_edges[index[state]].append(index[next_state])
+        closures = []
+        for q in range(len(states)):
+            closure = 1 << q
+            stack = [q]
+            while stack:
+                for r in epsilon_edges[stack.pop()]:
+                    if not closure >> r & 1:
+                        closure |= 1 << r
+                        stack.append(r)
+            closures.append(closure)
+
+        successors = []
+        for symbol in symbols:
+            row = [0] * len(states)
+            for state, transitions in self.delta.items():
+                mask = 0
+                for next_state in transitions.get(symbol, []):
+                    mask |= closures[index[next_state]]
+                row[index[state]] = mask
+            successors.append(row)
+
+        final = 0
+        for state in self.F:
+            if state in index:
+                final |= 1 << index[state]
+        return states, symbols, successors, closures[index[self.q0]], final
 
-        return set(state_mapping.values()), set(self.sigma), grammar_productions, state_mapping[self.q0]
+    def determinize(self):
+        states, symbols, successors, start, final = self.subsetTables()
+        subsets = [start]
+        subset_ids = {start: 0}
+        rows = [None]
+        unprocessed = [0]
+        while unprocessed:
+            subset_id = unprocessed.pop()
+            members = list(iterBits(subsets[subset_id]))
+            row = [-1] * len(symbols)
+            for a, successor in enumerate(successors):
+                next_subset = 0
+                for q in members:
+                    next_subset |= successor[q]
+                if next_subset:
+                    next_id = subset_ids.get(next_subset)
+                    if next_id is None:
+                        next_id = subset_ids[next_subset] = len(subsets)
+                        subsets.append(next_subset)
+                        rows.append(None)
+                        unprocessed.append(next_id)
+                    row[a] = next_id
+            rows[subset_id] = row
+
+        accepting = [bool(subset & final) for subset in subsets]
+        return states, symbols, subsets, rows, accepting
+
+    def epsilonClosure(self, states):
+        closure = set(states)
+        stack = list(closure)
+        while stack:
+            for next_state in self.delta.get(stack.pop(), {}).get(EPSILON, []):
+                if next_state not in closure:
+                    closure.add(next_state)
+                    stack.append(next_state)
+        return closure
+
+    def stringBelongToLanguage(self, input_string):
+        current_states = self.epsilonClosure({self.q0})
+        for symbol in input_string:
+            next_states = set()
+            for state in current_states:
+                next_states.update(self.delta.get(state, {}).get(symbol, []))
+            if not next_states:
+                return False
+            current_states = self.epsilonClosure(next_states)
+        return not current_states.isdisjoint(self.F)
+
+    def deterministicTables(self):
+        symbols = sorted({symbol for transitions in self.delta.values() for symbol in transitions} | set(self.sigma))
+        states = [self.q0]
+        state_ids = {self.q0: 0}
+        rows = []
+        for state in states:
+            transitions = self.delta.get(state, {})
+            row = []
+            for symbol in symbols:
+                next_states = transitions.get(symbol)
+                if not next_states:
+                    row.append(-1)
+                    continue
+                next_state = next_states[0]
+                if next_state not in state_ids:
+                    state_ids[next_state] = len(states)
+                    states.append(next_state)
+                row.append(state_ids[next_state])
+            rows.append(row)
+        accepting = [state in self.F for state in states]
+        return states, symbols, rows, accepting
+
+    def isEpsilonFree(self):
+        return not any(EPSILON in transitions for transitions in self.delta.values())
+
+    def lazyDfa(self, max_bytes=1 << 24):
+        return LazyDfa(self, max_bytes)
+
+    def minimize(self):
+        if self.isDeterministic() and self.isEpsilonFree():
+            _, symbols, rows, accepting = self.deterministicTables()
+        else:
+            _, symbols, _, rows, accepting = self.determinize()
+        block_of = hopcroft(rows, accepting, len(symbols))
+        dead_block = block_of[len(rows)]
+
+        block_names = {block_of[0]: stateName(0)}
+        representatives = [0]
+        delta = {}
+        for q in representatives:
+            name = block_names[block_of[q]]
+            for symbol, next_state in zip(symbols, rows[q]):
+                if next_state < 0 or block_of[next_state] == dead_block:
+                    continue
+                block = block_of[next_state]
+                if block not in block_names:
+                    block_names[block] = stateName(len(block_names))
+                    representatives.append(next_state)
+                delta.setdefault(name, {})[symbol] = [block_names[block]]
+
+        F = {block_names[block_of[q]] for q in representatives if accepting[q]}
+        return FiniteAutomaton(set(block_names.values()), set(symbols), delta, stateName(0), F)
 
     def ndfaToDfa(self):
-        dfa_states = [frozenset([self.q0])]
+        # An automaton that is already deterministic is only renumbered, which avoids
+        # building a bitset per state and keeps large DFAs linear.
+        if self.isDeterministic() and self.isEpsilonFree():
+            states, symbols, rows, accepting = self.deterministicTables()
+            subsets = None
+        else:
+            states, symbols, subsets, rows, accepting = self.determinize()
+        names = [stateName(i) for i in range(len(rows))]
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("DFA States:")
+            for i, name in enumerate(names):
+                members = [states[i]] if subsets is None else [states[q] for q in iterBits(subsets[i])]
+                logger.info("%s : %s", members, name)
+
         dfa_transitions = {}
-        dfa_final_states = set()
-
-        state_map = {frozenset([self.q0]): 'A'}
-        unprocessed_states = [frozenset([self.q0])]
-
-        print("DFA States:")
-        while unprocessed_states:
-            current_state = unprocessed_states.pop()
-            current_state_name = state_map[current_state]
-            print(f"{sorted(current_state)} : {current_state_name}")
-
-            for symbol in self.sigma:
-                next_state = set()
-                for state in current_state:
-                    if symbol in self.delta.get(state, {}):
-                        next_state.update(self.delta[state].get(symbol, []))
-
-                if next_state:
-                    next_state_frozenset = frozenset(next_state)
-                    if next_state_frozenset not in state_map:
-                        state_map[next_state_frozenset] = chr(65 + len(state_map))
-                        unprocessed_states.append(next_state_frozenset)
-
-                    if current_state_name not in dfa_transitions:
-                        dfa_transitions[current_state_name] = {}
-                    dfa_transitions[current_state_name][symbol] = state_map[next_state_frozenset]
-
-                    if next_state & set(self.F):
-                        dfa_final_states.add(state_map[next_state_frozenset])
-
-        return list(state_map.values()), dfa_transitions, dfa_final_states
-
-Q = {"q0", "q1", "q2"}
-sigma = {"a", "b"}
-F = {"q2"}
-delta = {
-    "q0": {"a": ["q0", "q1"], "b": ["q0"]},
-    "q1": {"b": ["q2"], "a": ["q0"]},
-    "q2": {"b": ["q2"]}
-}
-q0 = "q0"
-
-fa = FiniteAutomaton(Q, sigma, delta, q0, F)
-
-print(f"The FA is deterministic: {fa.isDeterministic()}")
-VN, VT, P, S = fa.convertToGrammar()
-print(f"Non-terminals: {VN}")
-print(f"Grammar rules: {P}")
-grammar = Grammar(VN, VT, P, S)
-print(grammar.classify())
-Q, delta, F = fa.ndfaToDfa()
-print(f"States: {Q}")
-print(f"Transitions: {delta}")
-print(f"Final States: {F}")
\ No newline at end of file
+        for name, row in zip(names, rows):
+            moves = {symbol: names[next_id] for symbol, next_id in zip(symbols, row) if next_id >= 0}
+            if moves:
+                dfa_transitions[name] = moves
+        dfa_final_states = {name for name, is_final in zip(names, accepting) if is_final}
+
+        return names, dfa_transitions, dfa_final_states
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
+    VN = {"S", "B", "C"}
+    VT = {"a", "b", "c"}
+    P = {
+        "S": ["aB"],
+        "B": ["aC", "bB"],
+        "C": ["bB", "c", "aS"]
+    }
+    S = "S"
+
+    grammar = Grammar(VN, VT, P, S)
+    print(grammar.classify())
+
+    Q = {"q0", "q1", "q2"}
+    sigma = {"a", "b"}
+    F = {"q2"}
+    delta = {
+        "q0": {"a": ["q0", "q1"], "b": ["q0"]},
+        "q1": {"b": ["q2"], "a": ["q0"]},
+        "q2": {"b": ["q2"]}
+    }
+    q0 = "q0"
+
+    fa = FiniteAutomaton(Q, sigma, delta, q0, F)
+
+    print(f"The FA is deterministic: {fa.isDeterministic()}")
+    VN, VT, P, S = fa.convertToGrammar()
+    print(f"Non-terminals: {VN}")
+    print(f"Grammar rules: {P}")
+    grammar = Grammar(VN, VT, P, S)
+    print(grammar.classify())
+    Q, delta, F = fa.ndfaToDfa()
+    print(f"States: {Q}")
+    print(f"Transitions: {delta}")
+    print(f"Final States: {F}")
@@ -0,0 +1,124 @@
+import random
+import sys
+import time
+
+from Lab2 import FiniteAutomaton, Grammar, stateName
+
+def random_nfa(size, symbols="ab", out_degree=2, seed=0):
+    rng = random.Random(seed)
+    states = [f"q{i}" for i in range(size)]
+    delta = {state: {symbol: rng.sample(states, rng.randint(0, out_degree)) for symbol in symbols} for state in states}
+    finals = set(rng.sample(states, max(1, size // 4)))
+    return FiniteAutomaton(set(states), set(symbols), delta, states[0], finals)
+
+def dfa_automaton(fa):
+    names, transitions, finals = fa.ndfaToDfa()
+    delta = {state: {symbol: [next_state] for symbol, next_state in moves.items()} for state, moves in transitions.items()}
+    return FiniteAutomaton(set(names), set(fa.sigma), delta, names[0], finals)
+
+def matching_rate(fa, strings):
+    start = time.perf_counter()
+    for string in strings:
+        fa.stringBelongToLanguage(string)
+    return len(strings) / (time.perf_counter() - start)
+
+def keyword_nfa(keywords, symbols):
+    # Σ*(w1|w2|...): one chain of states per keyword, shared prefixes merged into a trie.
+    delta = {"r": {symbol: ["r"] for symbol in symbols}}
+    finals = set()
+    for keyword in keywords:
+        state = "r"
+        for i in range(1, len(keyword) + 1):
+            next_state = "r" + keyword[:i]
+            targets = delta.setdefault(state, {}).setdefault(keyword[i - 1], [])
+            if next_state not in targets:
+                targets.append(next_state)
+            delta.setdefault(next_state, {})
+            state = next_state
+        finals.add(state)
+    return FiniteAutomaton(set(delta), set(symbols), delta, "r", finals)
+
+def random_keywords(count, symbols="abcd", seed=0):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(symbols) for _ in range(rng.randint(5, 12))) for _ in range(count)]
+
+def nth_from_last_nfa(n):
+    # (a|b)*a(a|b)^n: the smallest DFA needs 2^(n+1) states.
+    states = [f"q{i}" for i in range(n + 2)]
+    delta = {states[0]: {"a": [states[0], states[1]], "b": [states[0]]}}
+    for i in range(1, n + 1):
+        delta[states[i]] = {"a": [states[i + 1]], "b": [states[i + 1]]}
+    return FiniteAutomaton(set(states), {"a", "b"}, delta, states[0], {states[-1]})
+
+def random_dfa(size, symbols, out_degree=3, seed=0):
+    rng = random.Random(seed)
+    states = [f"q{i}" for i in range(size)]
+    delta = {state: {symbol: [rng.choice(states)] for symbol in rng.sample(symbols, out_degree)} for state in states}
+    return FiniteAutomaton(set(states), set(symbols), delta, states[0], set(rng.sample(states, size // 3)))
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    print("Keyword search NFAs over abcd")
+    print(f"{'NFA states':>10} {'DFA states':>11} {'seconds':>9}")
+    for count in (10, 100, 1_000, 5_000):
+        fa = keyword_nfa(random_keywords(count, seed=count), "abcd")
+        (names, _, _), elapsed = timed(fa.ndfaToDfa)
+        print(f"{len(fa.Q):>10,} {len(names):>11,} {elapsed:>9.3f}")
+
+    print("\nMinimizing random NFAs, 2 symbols, up to 3 targets per move")
+    print(f"{'NFA states':>10} {'DFA states':>11} {'minimal':>8} {'minimize s':>11} {'DFA str/s':>10} {'min str/s':>10}")
+    rng = random.Random(0)
+    strings = [''.join(rng.choice("ab") for _ in range(rng.randint(10, 40))) for _ in range(20_000)]
+    for size in (8, 16, 32, 64, 128):
+        dfa = dfa_automaton(random_nfa(size, out_degree=3, seed=size))
+        minimal, elapsed = timed(dfa.minimize)
+        print(f"{size:>10,} {len(dfa.Q):>11,} {len(minimal.Q):>8,} {elapsed:>11.3f} "
+              f"{matching_rate(dfa, strings):>10,.0f} {matching_rate(minimal, strings):>10,.0f}")
+
+    print("\nLazy DFA, 2,000 strings of length 200 matched three times")
+    print(f"{'automaton':<22} {'cache':>8} {'NFA str/s':>10} {'cold str/s':>11} {'warm str/s':>11} {'rows':>8} {'evictions':>10}")
+    rng = random.Random(0)
+    cases = [
+        ("1,000 keywords", keyword_nfa(random_keywords(1_000, seed=1), "abcd"), "abcd"),
+        ("(a|b)*a(a|b)^30", nth_from_last_nfa(30), "ab"),
+    ]
+    for label, fa, symbols in cases:
+        strings = [''.join(rng.choice(symbols) for _ in range(200)) for _ in range(2_000)]
+        nfa_rate = matching_rate(fa, strings)
+        for max_bytes in (1 << 16, 1 << 20, 1 << 26):
+            lazy = fa.lazyDfa(max_bytes)
+            cold = matching_rate(lazy, strings)
+            matching_rate(lazy, strings)
+            warm = matching_rate(lazy, strings)
+            print(f"{label:<22} {max_bytes >> 10:>6} K {nfa_rate:>10,.0f} {cold:>11,.0f} {warm:>11,.0f} "
+                  f"{len(lazy.rows):>8,} {lazy.evictions:>10,}")
+
+    # Every other state name is also an input symbol, so the grammar has to avoid them.
+    print("\nDFA -> grammar -> NFA -> DFA, 3 moves per state over 50 symbols A, C, ..., AX")
+    print(f"{'states':>10} {'to grammar':>11} {'to NFA':>8} {'to DFA':>8} {'DFA states':>11}")
+    symbols = [stateName(i) for i in range(0, 100, 2)]
+    rng = random.Random(0)
+    for size in (1_000, 10_000, 100_000):
+        fa = random_dfa(size, symbols, seed=size)
+        converted, elapsed_grammar = timed(fa.convertToGrammar)
+        grammar = Grammar(*converted)
+        assert grammar.VN.isdisjoint(grammar.VT) and grammar.classify() == "Type 3 (Regular)"
+        nfa, elapsed_nfa = timed(grammar.toFiniteAutomaton)
+        (names, _, _), elapsed_dfa = timed(nfa.ndfaToDfa)
+        words = [[rng.choice(symbols) for _ in range(rng.randint(1, 6))] for _ in range(500)]
+        assert all(fa.stringBelongToLanguage(word) == nfa.stringBelongToLanguage(word) for word in words)
+        print(f"{size:>10,} {elapsed_grammar:>11.3f} {elapsed_nfa:>8.3f} {elapsed_dfa:>8.3f} {len(names):>11,}")
+
+    print("\n(a|b)*a(a|b)^n")
+    print(f"{'NFA states':>10} {'DFA states':>11} {'seconds':>9}")
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 17
+    for n in range(5, largest + 1, 3):
+        (names, _, _), elapsed = timed(nth_from_last_nfa(n).ndfaToDfa)
+        print(f"{n + 2:>10,} {len(names):>11,} {elapsed:>9.3f}")
+
+if __name__ == "__main__":
+    main()
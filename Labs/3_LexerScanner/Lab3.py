@@ -1,11 +1,12 @@
+import codecs
 import re
 
 TOKEN_SPECIFICATION = [
     ('FLOAT', r'\d+\.\d+'),
     ('NUMBER', r'\d+'),
-    ('CONSTANT', r'\b(pi|e)\b'),
-    ('TRIG', r'\b(sin|cos|tan|csc|sec|cot)\b'),
-    ('LOG', r'\b(log|ln|sqrt)\b'),
+    ('CONSTANT', r'(pi|e)\b'),
+    ('TRIG', r'(sin|cos|tan|csc|sec|cot)\b'),
+    ('LOG', r'(log|ln|sqrt)\b'),
     ('IDENTIFIER', r'[a-zA-Z_]\w*'),
     ('OPERATOR', r'[\+\-\*/\^=]'),
     ('ABS', r'\|'),
@@ -17,18 +18,28 @@ TOKEN_SPECIFICATION = [
     ('MISMATCH', r'.'),
 ]
 
+# Tokens are always matched from a token boundary, so the leading \b of the
+# keyword patterns is implied. It is left out on purpose: TOKEN_PATTERN.match(code, i)
+# looks behind position i, which would turn "2pi" into NUMBER IDENTIFIER.
 TOKEN_REGEX = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPECIFICATION)
+TOKEN_PATTERN = re.compile(TOKEN_REGEX)
 OPERATORS = {'OPERATOR'}
 FUNCTIONS = {'TRIG', 'LOG'}
+CHUNK_SIZE = 1 << 16
+# A match is only final once two more characters are known: "3." may still become
+# a FLOAT and "sin" may still grow into an IDENTIFIER.
+LOOKAHEAD = 2
 
-def lexer(code):
+def scan(code):
     tokens = []
     previous_kind = None
     errors = []
-    i = 0 
+    i = 0
+    length = len(code)
+    match_at = TOKEN_PATTERN.match
 
-    while i < len(code):
-        match = re.match(TOKEN_REGEX, code[i:])
+    while i < length:
+        match = match_at(code, i)
         if not match:
             errors.append(f"Unexpected character: {code[i]} at position {i}")
             i += 1
@@ -37,8 +48,8 @@ def lexer(code):
         kind = match.lastgroup
         value = match.group()
         start_index = i
-        end_index = i + len(value)
-        
+        end_index = match.end()
+
         if kind == 'FLOAT':
             value = float(value)
         elif kind == 'NUMBER':
@@ -56,28 +67,133 @@ def lexer(code):
             errors.append(f"Unexpected character: {value} at position {start_index}")
             i = end_index
             continue
-        
+
         if previous_kind in OPERATORS and kind in OPERATORS:
             errors.append(f"Consecutive operator error: '{tokens[-1][1]}{value}' at position {start_index}")
-        
+
         if kind in FUNCTIONS:
-            if i + len(value) >= len(code) or code[end_index] != '(':
+            if end_index >= length or code[end_index] != '(':
                 errors.append(f"Missing '(' after '{value}' at position {start_index}")
             else:
                 closing_index = code.find(')', end_index)
                 if closing_index == -1 or closing_index == end_index + 1:
                     errors.append(f"Empty parentheses or missing ')' after '{value}' at position {start_index}")
-        
+
         tokens.append((kind, value))
         previous_kind = kind
         i = end_index
 
+    return tokens, errors
+
+def _read_chunks(source, chunk_size):
+    if isinstance(source, str):
+        yield source
+        return
+    if hasattr(source, 'read'):
+        chunks = iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        chunks = iter(source)
+    decoder = None
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder('utf-8')()
+        yield decoder.decode(chunk)
+    if decoder is not None:
+        yield decoder.decode(b'', final=True)
+
+def _match_chunks(source, chunk_size):
+    buffer = ''
+    offset = 0
+    chunks = _read_chunks(source, chunk_size)
+    at_end = False
+    while not at_end:
+        chunk = next(chunks, None)
+        if chunk is None:
+            at_end = True
+        else:
+            buffer += chunk
+        end = len(buffer)
+        limit = end if at_end else end - LOOKAHEAD
+        pos = 0
+        while pos < end:
+            match = TOKEN_PATTERN.match(buffer, pos)
+            if match.end() > limit:
+                break
+            yield match.lastgroup, match.group(), offset + pos
+            pos = match.end()
+        buffer = buffer[pos:]
+        offset += pos
+
+def scan_stream(source, errors=None, chunk_size=CHUNK_SIZE):
+    if errors is None:
+        errors = []
+    previous_kind = None
+    previous_value = None
+    after_function = None
+    after_lparen = None
+    unclosed = []
+
+    for kind, value, start_index in _match_chunks(source, chunk_size):
+        if after_function is not None:
+            if kind != 'LPAREN':
+                errors.append(f"Missing '(' after '{after_function[0]}' at position {after_function[1]}")
+            else:
+                after_lparen = after_function
+            after_function = None
+        elif after_lparen is not None:
+            if kind == 'RPAREN':
+                errors.append(f"Empty parentheses or missing ')' after '{after_lparen[0]}' at position {after_lparen[1]}")
+            else:
+                unclosed.append(after_lparen)
+            after_lparen = None
+        if kind == 'RPAREN':
+            unclosed.clear()
+
+        if kind == 'FLOAT':
+            value = float(value)
+        elif kind == 'NUMBER':
+            value = int(value)
+        elif kind == 'CONSTANT':
+            value = 3.141592653589793 if value == 'pi' else 2.718281828459045
+        elif kind == 'COMMA':
+            errors.append(f"Invalid use of ','. Use '.' for floating-point numbers at position {start_index}")
+            continue
+        elif kind == 'SKIP' or kind == 'NEWLINE':
+            continue
+        elif kind == 'MISMATCH':
+            errors.append(f"Unexpected character: {value} at position {start_index}")
+            continue
+
+        if previous_kind in OPERATORS and kind in OPERATORS:
+            errors.append(f"Consecutive operator error: '{previous_value}{value}' at position {start_index}")
+
+        if kind in FUNCTIONS:
+            after_function = (value, start_index)
+
+        yield kind, value
+        previous_kind = kind
+        previous_value = value
+
+    if after_function is not None:
+        errors.append(f"Missing '(' after '{after_function[0]}' at position {after_function[1]}")
+    elif after_lparen is not None:
+        unclosed.append(after_lparen)
+    for value, start_index in unclosed:
+        errors.append(f"Empty parentheses or missing ')' after '{value}' at position {start_index}")
+
+def lexer(code):
+    tokens, errors = scan(code)
+
     for token in tokens:
         print(token)
-    
+
     if errors:
         for error in errors:
             print(error)
 
-code = "x = |sin(pi/2) + log(100)| + ln(e) + 2,1 + - 7 + sqrt(4) + tan()"
-lexer(code)
\ No newline at end of file
+if __name__ == "__main__":
+    code = "x = |sin(pi/2) + log(100)| + ln(e) + 2,1 + - 7 + sqrt(4) + tan()"
+    lexer(code)
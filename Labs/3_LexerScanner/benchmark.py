@@ -0,0 +1,54 @@
+import re
+import sys
+import time
+
+from Lab3 import TOKEN_REGEX, scan
+
+SAMPLE = "x = |sin(pi/2) + log(100)| + ln(e) + 2.1 * y ^ 3 - sqrt(4)\n"
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000]
+# The sliced scanner is quadratic, past this size it would run for hours.
+SLICED_LIMIT = 100_000
+
+def scan_sliced(code):
+    # The original scanning loop: re.match on code[i:] copies the rest of the input per token.
+    tokens = []
+    i = 0
+    while i < len(code):
+        match = re.match(TOKEN_REGEX, code[i:])
+        kind = match.lastgroup
+        value = match.group()
+        if kind not in ('SKIP', 'NEWLINE', 'COMMA', 'MISMATCH'):
+            tokens.append((kind, value))
+        i += len(value)
+    return tokens
+
+def make_input(size):
+    return (SAMPLE * (size // len(SAMPLE) + 1))[:size]
+
+def throughput(function, code):
+    start = time.perf_counter()
+    result = function(code)
+    elapsed = time.perf_counter() - start
+    count = len(result[0]) if isinstance(result, tuple) else len(result)
+    return count, count / elapsed
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1000:
+            return f"{size} {unit}"
+        size //= 1000
+    return f"{size} GB"
+
+def main():
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    print(f"{'input':>8} {'tokens':>10} {'sliced tok/s':>14} {'compiled tok/s':>16}")
+    for size in SIZES:
+        if size > max_size:
+            break
+        code = make_input(size)
+        count, after = throughput(scan, code)
+        before = f"{throughput(scan_sliced, code)[1]:,.0f}" if size <= SLICED_LIMIT else "-"
+        print(f"{format_size(size):>8} {count:>10,} {before:>14} {after:>16,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
+import io
+import os
 import random
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 
 def parse_expression(regex):
     def parse_group(i):
@@ -61,17 +66,355 @@ def generate(tree):
             return ''.join(generate(token) for token in tree)
     return ''
 
-regex = "O(P|Q|R)+2(3|4)"
-print(f"Regex: {regex}")
-for _ in range(10):
-    print(generate(parse_expression(regex)))
+OPERATORS = ('|', '*', '+', '?', '^')
 
-regex = "A*B(C|D|E)F(G|H|I)^2"
-print(f"\nRegex: {regex}")
-for _ in range(10):
-    print(generate(parse_expression(regex)))
+def _is_operator(tree):
+    return bool(tree) and isinstance(tree[0], str) and tree[0] in OPERATORS
 
-regex = "J+K(L|M|N)*0?(P|Q)^3"
-print(f"\nRegex: {regex}")
-for _ in range(10):
-    print(generate(parse_expression(regex)))
\ No newline at end of file
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class ThompsonNFA:
+    # The tree as a Thompson NFA: every state has at most one symbol edge, stored in
+    # symbol_of/target, plus its ε-edges. With reverse=True concatenations are built
+    # back to front, which gives the NFA of the reversed language.
+    def __init__(self, tree, reverse=False):
+        self.symbol_of = []
+        self.target = []
+        self.epsilon = []
+        self.reverse = reverse
+        self.start, self.end = self._fragment(tree)
+
+    def _state(self):
+        self.symbol_of.append(None)
+        self.target.append(None)
+        self.epsilon.append([])
+        return len(self.symbol_of) - 1
+
+    def _fragment(self, tree):
+        start, end = self._state(), self._state()
+        if isinstance(tree, str):
+            self.symbol_of[start] = tree
+            self.target[start] = end
+        elif _is_operator(tree) and tree[0] == '|':
+            for branch in (tree[1], tree[2]):
+                inner_start, inner_end = self._fragment(branch)
+                self.epsilon[start].append(inner_start)
+                self.epsilon[inner_end].append(end)
+        elif _is_operator(tree) and tree[0] == '^':
+            items = [tree[1]] * tree[2]
+            self._chain(start, end, items)
+        elif _is_operator(tree):
+            inner_start, inner_end = self._fragment(tree[1])
+            self.epsilon[start].append(inner_start)
+            self.epsilon[inner_end].append(end)
+            if tree[0] in '*+':
+                self.epsilon[inner_end].append(inner_start)
+            if tree[0] in '*?':
+                self.epsilon[start].append(end)
+        else:
+            self._chain(start, end, tree[::-1] if self.reverse else tree)
+        return start, end
+
+    def _chain(self, start, end, items):
+        current = start
+        for item in items:
+            inner_start, inner_end = self._fragment(item)
+            self.epsilon[current].append(inner_start)
+            current = inner_end
+        self.epsilon[current].append(end)
+
+    def closures(self):
+        closures = []
+        for state in range(len(self.epsilon)):
+            mask = 1 << state
+            stack = [state]
+            while stack:
+                for nxt in self.epsilon[stack.pop()]:
+                    if not mask >> nxt & 1:
+                        mask |= 1 << nxt
+                        stack.append(nxt)
+            closures.append(mask)
+        return closures
+
+class LazyDFA:
+    # Subset construction done on demand: a DFA state is a bitset of NFA states, and a
+    # transition is computed the first time it is taken and then kept in a flat table
+    # (state * width + symbol, -1 while unknown). Symbols outside the alphabet share the
+    # last column. An unanchored DFA adds the start closure back after every step, so it
+    # tracks matches starting anywhere. Past max_states the cache is flushed.
+    def __init__(self, nfa, alphabet, unanchored=False, max_states=10_000):
+        closures = nfa.closures()
+        self.width = len(alphabet) + 1
+        self.moves = [[0] * len(closures) for _ in range(self.width)]
+        for state, symbol in enumerate(nfa.symbol_of):
+            if symbol is not None:
+                self.moves[alphabet[symbol]][state] = closures[nfa.target[state]]
+        self.start_set = closures[nfa.start]
+        self.final = 1 << nfa.end
+        self.unanchored = unanchored
+        self.max_states = max_states
+        self.ids = {}
+        self.sets = []
+        self.accepting = []
+        self.table = []
+        self.flushes = 0
+        self.start = self.state(self.start_set)
+
+    def state(self, subset):
+        index = self.ids.get(subset)
+        if index is None:
+            index = self.ids[subset] = len(self.sets)
+            self.sets.append(subset)
+            self.accepting.append(bool(subset & self.final))
+            self.table.extend([-1] * self.width)
+        return index
+
+    def step(self, index, symbol):
+        subset = self.sets[index]
+        moves = self.moves[symbol]
+        target = self.start_set if self.unanchored else 0
+        for state in _bits(subset):
+            target |= moves[state]
+        if len(self.sets) >= self.max_states:
+            self.flush()
+            index = self.state(subset)
+        nxt = self.state(target)
+        self.table[index * self.width + symbol] = nxt
+        return nxt
+
+    def flush(self):
+        self.ids.clear()
+        del self.sets[:]
+        del self.accepting[:]
+        del self.table[:]
+        self.flushes += 1
+        self.start = self.state(self.start_set)
+
+    def dead(self, index):
+        return not self.sets[index]
+
+class RegexMatcher:
+    # Matching against a parse_expression tree in linear time, with no backtracking.
+    # X^n matches n independent repetitions of X. match() and search() return the
+    # (start, end) span of the leftmost-longest match, or None. search() first scans
+    # the reversed input with the unanchored reversed DFA to find the leftmost start,
+    # then runs the forward DFA from there for the longest end. str and bytes inputs
+    # are both accepted; a byte matches the character with the same code.
+    def __init__(self, regex, max_states=10_000):
+        self.regex = regex
+        tree = parse_expression(regex)
+        characters = sorted(_characters(tree))
+        self.alphabet = {symbol: index for index, symbol in enumerate(characters)}
+        self.byte_alphabet = {ord(symbol): index for symbol, index in self.alphabet.items() if ord(symbol) < 256}
+        self.other = len(characters)
+        self.forward = LazyDFA(ThompsonNFA(tree), self.alphabet, max_states=max_states)
+        self.backward = LazyDFA(ThompsonNFA(tree, reverse=True), self.alphabet, True, max_states)
+
+    def _symbols(self, text):
+        return self.byte_alphabet if isinstance(text, (bytes, bytearray, memoryview)) else self.alphabet
+
+    def _longest(self, text, start):
+        # End of the longest match starting at start, or -1.
+        dfa = self.forward
+        symbols = self._symbols(text)
+        other = self.other
+        width = dfa.width
+        table = dfa.table
+        accepting = dfa.accepting
+        index = dfa.start
+        best = start if accepting[index] else -1
+        position = start
+        for symbol in text[start:] if start else text:
+            position += 1
+            a = symbols.get(symbol, other)
+            nxt = table[index * width + a]
+            if nxt < 0:
+                nxt = dfa.step(index, a)
+            if dfa.dead(nxt):
+                break
+            index = nxt
+            if accepting[index]:
+                best = position
+        return best
+
+    def fullmatch(self, text):
+        return self._longest(text, 0) == len(text)
+
+    def match(self, text):
+        end = self._longest(text, 0)
+        return (0, end) if end >= 0 else None
+
+    def search(self, text):
+        dfa = self.backward
+        symbols = self._symbols(text)
+        other = self.other
+        width = dfa.width
+        table = dfa.table
+        accepting = dfa.accepting
+        index = dfa.start
+        leftmost = len(text) if accepting[index] else -1
+        position = len(text)
+        for symbol in reversed(text):
+            position -= 1
+            a = symbols.get(symbol, other)
+            nxt = table[index * width + a]
+            if nxt < 0:
+                nxt = dfa.step(index, a)
+            index = nxt
+            if accepting[index]:
+                leftmost = position
+        if leftmost < 0:
+            return None
+        return leftmost, self._longest(text, leftmost)
+
+def _characters(tree):
+    if isinstance(tree, str):
+        return {tree}
+    if _is_operator(tree):
+        children = tree[1:3] if tree[0] == '|' else tree[1:2]
+    else:
+        children = tree
+    return set().union(*map(_characters, children)) if children else set()
+
+def compile_regex(regex, max_states=10_000):
+    return RegexMatcher(regex, max_states)
+
+class StringGenerator:
+    # generate() compiled once. Every node becomes either a constant string or a
+    # closure, runs of literals are merged, and the random decisions are taken from
+    # bytes drawn in 64 KB blocks from a seeded random.Random, so a seed always gives
+    # the same strings. The distribution is the one of generate(): '|' picks each side
+    # with probability 1/2, '*' repeats 0-5 times, '+' 1-5 times, '?' is a coin flip and
+    # X^n repeats one generated string, or one chosen side of an alternation, n times.
+    def __init__(self, regex, seed=None):
+        self.regex = regex
+        self.rng = random.Random(seed)
+        self.draw = chain.from_iterable(iter(lambda: self.rng.randbytes(1 << 16), None)).__next__
+        root = self._compile(parse_expression(regex))
+        self.generate = root if callable(root) else (lambda: root)
+
+    def _repeats(self, low, high):
+        draw = self.draw
+        options = high - low + 1
+        # the largest multiple of options below 256 keeps the count uniform
+        limit = 256 - 256 % options
+
+        def repeats():
+            while True:
+                value = draw()
+                if value < limit:
+                    return low + value % options
+        return repeats
+
+    def _compile(self, tree):
+        draw = self.draw
+        if isinstance(tree, str):
+            return tree
+        if not _is_operator(tree):
+            parts = []
+            for item in map(self._compile, tree):
+                if isinstance(item, str) and parts and isinstance(parts[-1], str):
+                    parts[-1] += item
+                else:
+                    parts.append(item)
+            if not parts:
+                return ''
+            if len(parts) == 1:
+                return parts[0]
+            calls = [part if callable(part) else (lambda part=part: part) for part in parts]
+            return lambda: ''.join([call() for call in calls])
+
+        operator = tree[0]
+        if operator == '|':
+            left, right = (_as_call(self._compile(branch)) for branch in (tree[1], tree[2]))
+            return lambda: left() if draw() < 128 else right()
+        if operator == '?':
+            inner = _as_call(self._compile(tree[1]))
+            return lambda: inner() if draw() < 128 else ''
+        if operator in '*+':
+            inner = self._compile(tree[1])
+            repeats = self._repeats(0, 5) if operator == '*' else self._repeats(1, 5)
+            if isinstance(inner, str):
+                return lambda: inner * repeats()
+            return lambda: ''.join([inner() for _ in range(repeats())])
+
+        base, count = tree[1], tree[2]
+        if _is_operator(base) and base[0] == '|':
+            left, right = (_as_call(self._compile(branch)) for branch in (base[1], base[2]))
+            return lambda: _repeat_call(left if draw() < 128 else right, count)
+        inner = self._compile(base)
+        if isinstance(inner, str):
+            return inner * count
+        return lambda: inner() * count
+
+    def __call__(self):
+        return self.generate()
+
+    def sample(self, count):
+        generate = self.generate
+        return [generate() for _ in range(count)]
+
+    def write(self, file, count, separator='\n', batch_size=10_000):
+        # Streams count strings to a text or binary file in batches, returns the count.
+        binary = not isinstance(file, io.TextIOBase)
+        generate = self.generate
+        remaining = count
+        while remaining > 0:
+            batch = min(batch_size, remaining)
+            text = separator.join([generate() for _ in range(batch)]) + separator
+            file.write(text.encode() if binary else text)
+            remaining -= batch
+        return count
+
+def _as_call(compiled):
+    return compiled if callable(compiled) else (lambda: compiled)
+
+def _repeat_call(call, count):
+    return ''.join([call() for _ in range(count)])
+
+def compile_generator(regex, seed=None):
+    return StringGenerator(regex, seed)
+
+def _write_shard(regex, seed, path, count):
+    with open(path, 'wb') as file:
+        return compile_generator(regex, seed).write(file, count)
+
+def generate_to_file(regex, path, count, processes=None, seed=0):
+    # Splits the work into one shard per process, each with its own generator seeded
+    # from (seed, shard), then concatenates the shards in order. The output only
+    # depends on the seed and the number of processes.
+    processes = processes or os.cpu_count() or 1
+    counts = [count // processes + (shard < count % processes) for shard in range(processes)]
+    paths = [f"{path}.{shard}" for shard in range(processes)]
+    seeds = [f"{seed}:{shard}" for shard in range(processes)]
+    if processes == 1:
+        _write_shard(regex, seeds[0], paths[0], counts[0])
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            list(executor.map(_write_shard, [regex] * processes, seeds, paths, counts))
+    with open(path, 'wb') as output:
+        for shard_path in paths:
+            with open(shard_path, 'rb') as shard:
+                shutil.copyfileobj(shard, output)
+            os.remove(shard_path)
+    return count
+
+if __name__ == "__main__":
+    regex = "O(P|Q|R)+2(3|4)"
+    print(f"Regex: {regex}")
+    for _ in range(10):
+        print(generate(parse_expression(regex)))
+
+    regex = "A*B(C|D|E)F(G|H|I)^2"
+    print(f"\nRegex: {regex}")
+    for _ in range(10):
+        print(generate(parse_expression(regex)))
+
+    regex = "J+K(L|M|N)*0?(P|Q)^3"
+    print(f"\nRegex: {regex}")
+    for _ in range(10):
+        print(generate(parse_expression(regex)))
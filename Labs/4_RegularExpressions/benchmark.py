@@ -0,0 +1,76 @@
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+from Lab4 import RegexMatcher, compile_generator, generate, generate_to_file, parse_expression
+
+PATTERNS = ["O(P|Q|R)+2(3|4)", "A*B(C|D|E)F(G|H|I)^2", "J+K(L|M|N)*0?(P|Q)^3"]
+
+def to_python(regex):
+    # Lab4 writes a repeat count as X^n where Python writes X{n}.
+    return re.sub(r'\^(\d+)', r'{\1}', regex)
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def search_throughput(size):
+    rng = random.Random(0)
+    print(f"search over {size:,} random characters (MB/s)")
+    print(f"{'pattern':<24} {'re':>8} {'str':>8} {'bytes':>8}")
+    text = ''.join(rng.choice('ABCDEFGHIJKLMNOPQR01234') for _ in range(size))
+    data = text.encode()
+    for regex in PATTERNS:
+        matcher = RegexMatcher(regex)
+        python = re.compile(to_python(regex))
+        _, re_time = timed(python.search, text)
+        span, str_time = timed(matcher.search, text)
+        _, bytes_time = timed(matcher.search, data)
+        print(f"{regex:<24} {size / re_time / 1e6:>8.1f} {size / str_time / 1e6:>8.2f} {size / bytes_time / 1e6:>8.2f}")
+
+def pathological(largest):
+    print("\nfullmatch on pathological inputs (seconds)")
+    print(f"{'pattern':<24} {'n':>4} {'re':>10} {'RegexMatcher':>13}")
+    for n in (10, 16, 20, 22, 24, 26, 28):
+        if n > largest:
+            break
+        cases = [
+            (f"(a?)^{n}a^{n}", 'a' * n),
+            ("(a|aa)*c", 'a' * n),
+            ("(a*)*b", 'a' * n),
+        ]
+        for regex, text in cases:
+            python = re.compile(to_python(regex))
+            expected, re_time = timed(python.fullmatch, text)
+            matched, time_taken = timed(RegexMatcher(regex).fullmatch, text)
+            assert matched == bool(expected)
+            print(f"{regex:<24} {n:>4} {re_time:>10.4f} {time_taken:>13.4f}")
+
+def generation_throughput(count):
+    print(f"\ngenerating {count:,} strings (strings/s)")
+    print(f"{'pattern':<24} {'generate':>10} {'compiled':>10} {'to file':>10} {'4 shards':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corpus.txt")
+        for regex in PATTERNS:
+            legacy = min(count, 100_000)
+            _, legacy_time = timed(lambda: [generate(parse_expression(regex)) for _ in range(legacy)])
+            generator = compile_generator(regex, seed=0)
+            _, compiled_time = timed(generator.sample, count)
+            with open(path, 'wb') as file:
+                _, file_time = timed(generator.write, file, count)
+            _, shard_time = timed(generate_to_file, regex, path, count, 4)
+            print(f"{regex:<24} {legacy / legacy_time:>10,.0f} {count / compiled_time:>10,.0f} "
+                  f"{count / file_time:>10,.0f} {count / shard_time:>10,.0f}")
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    search_throughput(size)
+    pathological(int(sys.argv[2]) if len(sys.argv) > 2 else 24)
+    generation_throughput(int(sys.argv[3]) if len(sys.argv) > 3 else 1_000_000)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,244 @@
-from typing import List, Dict, Set, Tuple
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Dict, Optional, Sequence, Set, Tuple
+
+def _bits(mask: int):
+    digits = bin(mask)[:1:-1]
+    position = digits.find('1')
+    while position >= 0:
+        yield position
+        position = digits.find('1', position + 1)
+
+class ProductionStore:
+    # Productions as tuples of interned symbol ids. Every head keeps its rules in an
+    # insertion-ordered dict used as a set, and by_rhs maps a right-hand side back to
+    # the heads producing it. Stores made with spawn() share the symbol table.
+    def __init__(self, symbols: Optional['ProductionStore'] = None):
+        self.ids: Dict[str, int] = symbols.ids if symbols is not None else {}
+        self.names: List[str] = symbols.names if symbols is not None else []
+        self.rules: Dict[int, Dict[Tuple[int, ...], None]] = {}
+        self.by_rhs: Dict[Tuple[int, ...], Dict[int, None]] = {}
+        self.size = 0
+        self.epsilon = self.intern('ε')
+
+    @classmethod
+    def from_dict(cls, productions: Dict[str, List[List[str]]]) -> 'ProductionStore':
+        store = cls()
+        for var, rules in productions.items():
+            head = store.intern(var)
+            store.add_head(head)
+            for rule in rules:
+                store.add(head, store.encode(rule))
+        return store
+
+    def spawn(self) -> 'ProductionStore':
+        return ProductionStore(self)
+
+    def intern(self, symbol: str) -> int:
+        index = self.ids.get(symbol)
+        if index is None:
+            index = self.ids[symbol] = len(self.names)
+            self.names.append(symbol)
+        return index
+
+    def encode(self, rule: Sequence[str]) -> Tuple[int, ...]:
+        return tuple(self.intern(sym) for sym in rule)
+
+    def decode(self, rule: Tuple[int, ...]) -> List[str]:
+        names = self.names
+        return [names[sym] for sym in rule]
+
+    def add_head(self, head: int):
+        if head not in self.rules:
+            self.rules[head] = {}
+
+    def add(self, head: int, rule: Tuple[int, ...]) -> bool:
+        rules = self.rules.get(head)
+        if rules is None:
+            rules = self.rules[head] = {}
+        elif rule in rules:
+            return False
+        rules[rule] = None
+        self.by_rhs.setdefault(rule, {})[head] = None
+        self.size += 1
+        return True
+
+    def discard(self, head: int, rule: Tuple[int, ...]) -> bool:
+        rules = self.rules.get(head)
+        if rules is None or rule not in rules:
+            return False
+        del rules[rule]
+        heads = self.by_rhs[rule]
+        del heads[head]
+        if not heads:
+            del self.by_rhs[rule]
+        self.size -= 1
+        return True
+
+    def remove_head(self, head: int):
+        for rule in list(self.rules.get(head, ())):
+            self.discard(head, rule)
+        self.rules.pop(head, None)
+
+    def heads_of(self, rule: Tuple[int, ...]):
+        return self.by_rhs.get(rule, {}).keys()
+
+    def __contains__(self, item: Tuple[int, Tuple[int, ...]]) -> bool:
+        head, rule = item
+        return rule in self.rules.get(head, ())
+
+    def __len__(self) -> int:
+        return self.size
+
+    def to_dict(self) -> Dict[str, List[List[str]]]:
+        names = self.names
+        return {
+            names[head]: [[names[sym] for sym in rule] for rule in rules]
+            for head, rules in self.rules.items()
+        }
+
+class _Saturation:
+    # The _saturate fixed point kept up to date under rule edits. Each member has a rank
+    # one above the symbols of the rule that proved it, and keeps its place as long as
+    # some rule still proves it from lower-ranked members; only heads without such a
+    # rule are dropped on a removal, and those still supported are then re-added.
+    def __init__(self, needs_proof):
+        self.needs_proof = needs_proof
+        self.members: Set[int] = set()
+        self.rank: Dict[int, int] = {}
+        self.rules: Dict[int, Set[Tuple[int, ...]]] = {}
+        self.remaining: Dict[Tuple[int, Tuple[int, ...]], int] = {}
+        self.occurrences: Dict[int, Dict[Tuple[int, Tuple[int, ...]], int]] = {}
+
+    def add(self, head: int, rule: Tuple[int, ...]) -> Set[int]:
+        key = (head, rule)
+        count = 0
+        for sym in rule:
+            if self.needs_proof(sym):
+                uses = self.occurrences.setdefault(sym, {})
+                uses[key] = uses.get(key, 0) + 1
+                if sym not in self.members:
+                    count += 1
+        self.remaining[key] = count
+        self.rules.setdefault(head, set()).add(rule)
+        if count == 0 and head not in self.members:
+            return self._propagate([key])
+        return set()
+
+    def remove(self, head: int, rule: Tuple[int, ...]) -> Set[int]:
+        key = (head, rule)
+        del self.remaining[key]
+        for sym in set(rule):
+            uses = self.occurrences.get(sym)
+            if uses is not None and uses.pop(key, None) is not None and not uses:
+                del self.occurrences[sym]
+        self.rules[head].discard(rule)
+        if head not in self.members or self._supported(head):
+            return set()
+
+        lost = {head}
+        self.members.discard(head)
+        stack = [head]
+        while stack:
+            sym = stack.pop()
+            for key, count in self.occurrences.get(sym, {}).items():
+                self.remaining[key] += count
+                var = key[0]
+                if var in self.members and not self._supported(var):
+                    self.members.discard(var)
+                    lost.add(var)
+                    stack.append(var)
+        proved = [(var, rule) for var in lost for rule in self.rules.get(var, ()) if self.remaining[(var, rule)] == 0]
+        return lost - self._propagate(proved)
+
+    def _supported(self, head: int) -> bool:
+        rank = self.rank[head]
+        return any(
+            all(not self.needs_proof(sym) or (sym in self.members and self.rank[sym] < rank) for sym in rule)
+            for rule in self.rules.get(head, ())
+        )
+
+    def _propagate(self, worklist: List[Tuple[int, Tuple[int, ...]]]) -> Set[int]:
+        added = set()
+        while worklist:
+            head, rule = worklist.pop()
+            if head in self.members:
+                continue
+            self.members.add(head)
+            self.rank[head] = 1 + max((self.rank[sym] for sym in rule if self.needs_proof(sym)), default=0)
+            added.add(head)
+            for key, count in self.occurrences.get(head, {}).items():
+                self.remaining[key] -= count
+                if self.remaining[key] == 0 and key[0] not in self.members:
+                    worklist.append(key)
+        return added
+
+class _Reachability:
+    # Variables reachable from the start symbol, kept up to date the same way: the rank
+    # is the depth at which a variable was reached, and a variable survives losing an
+    # edge while some reachable parent of lower rank still points at it.
+    def __init__(self, start: int, is_variable):
+        self.start = start
+        self.is_variable = is_variable
+        self.members: Set[int] = {start}
+        self.rank: Dict[int, int] = {start: 0}
+        self.edges: Dict[int, Dict[int, int]] = {}
+        self.parents: Dict[int, Dict[int, int]] = {}
+
+    def add(self, head: int, rule: Tuple[int, ...]) -> Set[int]:
+        targets = self.edges.setdefault(head, {})
+        for sym in rule:
+            if self.is_variable(sym):
+                targets[sym] = targets.get(sym, 0) + 1
+                parents = self.parents.setdefault(sym, {})
+                parents[head] = parents.get(head, 0) + 1
+        if head in self.members:
+            return self._propagate([(sym, head) for sym in rule if self.is_variable(sym)])
+        return set()
+
+    def remove(self, head: int, rule: Tuple[int, ...]) -> Set[int]:
+        targets = self.edges[head]
+        cut = []
+        for sym in rule:
+            if self.is_variable(sym):
+                targets[sym] -= 1
+                self.parents[sym][head] -= 1
+                if not targets[sym]:
+                    del targets[sym]
+                    del self.parents[sym][head]
+                    cut.append(sym)
+        if head not in self.members:
+            return set()
+
+        lost = set()
+        stack = cut
+        while stack:
+            sym = stack.pop()
+            if sym in self.members and not self._supported(sym):
+                self.members.discard(sym)
+                lost.add(sym)
+                stack.extend(self.edges.get(sym, ()))
+        reached = [(var, parent) for var in lost for parent in self.parents.get(var, ()) if parent in self.members]
+        return lost - self._propagate(reached)
+
+    def _supported(self, var: int) -> bool:
+        if var == self.start:
+            return True
+        rank = self.rank[var]
+        return any(parent in self.members and self.rank[parent] < rank for parent in self.parents.get(var, ()))
+
+    def _propagate(self, worklist: List[Tuple[int, int]]) -> Set[int]:
+        added = set()
+        while worklist:
+            sym, parent = worklist.pop()
+            if sym in self.members:
+                continue
+            self.members.add(sym)
+            self.rank[sym] = self.rank[parent] + 1
+            added.add(sym)
+            worklist.extend((var, sym) for var in self.edges.get(sym, ()) if var not in self.members)
+        return added
 
 class CFG:
     def __init__(self, variables: Set[str], terminals: Set[str], productions: Dict[str, List[List[str]]], start_symbol: str):
@@ -7,158 +247,326 @@ class CFG:
         self.productions = productions
         self.start_symbol = start_symbol
         self.new_var_counter = 1
+        self.incremental: Optional['IncrementalCNF'] = None
 
-    def eliminate_epsilon_productions(self):
-        nullable = set()
-        changed = True
-        while changed:
-            changed = False
-            for var, rules in self.productions.items():
-                for rule in rules:
-                    if all(sym in nullable or sym == 'ε' for sym in rule):
-                        if var not in nullable:
-                            nullable.add(var)
-                            changed = True
-
-        new_productions = {}
-        for var in self.productions:
-            new_rules = set()
-            for rule in self.productions[var]:
-                rule_variants = self._generate_nullable_variants(rule, nullable)
-                new_rules.update(rule_variants)
-            if var != self.start_symbol:
-                new_rules.discard(('ε',))
-            new_productions[var] = [list(r) for r in new_rules if r]
-
-        self.productions = new_productions
-
-    def _generate_nullable_variants(self, rule: List[str], nullable: Set[str]) -> Set[Tuple[str]]:
-        from itertools import combinations
-        positions = [i for i, sym in enumerate(rule) if sym in nullable]
-        variants = set()
-        for i in range(0, len(positions) + 1):
-            for subset in combinations(positions, i):
-                temp = [sym for idx, sym in enumerate(rule) if idx not in subset]
-                if temp:
-                    variants.add(tuple(temp))
-                else:
-                    variants.add(('ε',))
+    @property
+    def productions(self) -> Dict[str, List[List[str]]]:
+        return self.store.to_dict()
+
+    @productions.setter
+    def productions(self, productions: Dict[str, List[List[str]]]):
+        self.store = ProductionStore.from_dict(productions)
+
+    def maintain_cnf(self) -> 'CFG':
+        # Returns a CNF copy of the grammar that add_production and remove_production
+        # keep up to date, instead of re-running the whole pipeline after every edit.
+        self.incremental = IncrementalCNF(self)
+        return self.incremental.cnf
+
+    def add_production(self, var: str, rule: List[str]) -> bool:
+        if self.incremental is not None:
+            self.incremental.add(var, rule)
+        self.variables.add(var)
+        self.variables |= {sym for sym in rule if sym not in self.terminals and sym != 'ε'}
+        return self.store.add(self.store.intern(var), self.store.encode(rule or ['ε']))
+
+    def remove_production(self, var: str, rule: List[str]) -> bool:
+        if self.incremental is not None:
+            self.incremental.remove(var, rule)
+        return self.store.discard(self.store.intern(var), self.store.encode(rule or ['ε']))
+
+    def _ids(self, symbols) -> Set[int]:
+        return {self.store.intern(sym) for sym in symbols}
+
+    def _names(self, ids) -> Set[str]:
+        names = self.store.names
+        return {names[sym] for sym in ids}
+
+    def _saturate(self, needs_proof: Set[int]) -> Set[int]:
+        # Worklist fixed point: a variable joins the set once one of its rules has all
+        # symbols that need proof in the set. Each rule keeps a count of those symbols
+        # and every symbol knows the rules it occurs in, so each occurrence is visited once.
+        result = set()
+        worklist = []
+        heads = []
+        remaining = []
+        occurrences: Dict[int, List[int]] = {}
+        for var, rules in self.store.rules.items():
+            for rule in rules:
+                index = len(heads)
+                heads.append(var)
+                count = 0
+                for sym in rule:
+                    if sym in needs_proof:
+                        count += 1
+                        occurrences.setdefault(sym, []).append(index)
+                remaining.append(count)
+                if count == 0 and var not in result:
+                    result.add(var)
+                    worklist.append(var)
+
+        while worklist:
+            sym = worklist.pop()
+            for index in occurrences.get(sym, []):
+                remaining[index] -= 1
+                if remaining[index] == 0 and heads[index] not in result:
+                    result.add(heads[index])
+                    worklist.append(heads[index])
+        return result
+
+    def _nullable_ids(self) -> Set[int]:
+        return self._saturate(set(range(len(self.store.names))) - {self.store.epsilon})
+
+    def _productive_ids(self) -> Set[int]:
+        return self._saturate(set(range(len(self.store.names))) - self._ids(self.terminals) - {self.store.epsilon})
+
+    def _find_nullable(self) -> Set[str]:
+        return self._names(self._nullable_ids())
+
+    def _find_productive(self) -> Set[str]:
+        return self._names(self._productive_ids())
+
+    def eliminate_epsilon_productions(self, binarize: bool = False):
+        # With binarize=True long rules are first split into two-symbol chains, so a
+        # rule has at most four nullable variants instead of 2^k.
+        if binarize:
+            self.store = self._binarize(self.store)
+        store = self.store
+        nullable = self._nullable_ids()
+        start = store.intern(self.start_symbol)
+        empty = (store.epsilon,)
+
+        new_store = store.spawn()
+        for var, rules in store.rules.items():
+            new_store.add_head(var)
+            for rule in rules:
+                for variant in self._generate_nullable_variants(rule, nullable, store.epsilon):
+                    if variant != empty or var == start:
+                        new_store.add(var, variant)
+
+        self.store = new_store
+
+    def _generate_nullable_variants(self, rule: Tuple[int, ...], nullable: Set[int], epsilon: int) -> Set[Tuple[int, ...]]:
+        # Extend the variants one symbol at a time; deduplicating after every nullable
+        # symbol keeps runs of the same nullable variable from multiplying.
+        variants = {()}
+        for sym in rule:
+            if sym == epsilon:
+                continue
+            if sym in nullable:
+                variants |= {variant + (sym,) for variant in variants}
+            else:
+                variants = {variant + (sym,) for variant in variants}
+        if () in variants:
+            variants.discard(())
+            variants.add((epsilon,))
         return variants
 
+    def _unit_closure(self) -> Dict[int, List[int]]:
+        store = self.store
+        variables = self._ids(self.variables)
+        unit_targets = {
+            A: [rule[0] for rule in store.rules.get(A, ()) if len(rule) == 1 and rule[0] in variables]
+            for A in variables
+        }
+        closure = {}
+        for A, targets in unit_targets.items():
+            reached = []
+            seen = set()
+            stack = list(targets)
+            while stack:
+                B = stack.pop()
+                if B in seen:
+                    continue
+                seen.add(B)
+                reached.append(B)
+                stack.extend(unit_targets.get(B, []))
+            closure[A] = reached
+        return closure
+
     def eliminate_unit_productions(self):
-        unit_pairs = set()
-        for A in self.variables:
-            for rule in self.productions.get(A, []):
-                if len(rule) == 1 and rule[0] in self.variables:
-                    unit_pairs.add((A, rule[0]))
+        store = self.store
+        variables = self._ids(self.variables)
+        closure = self._unit_closure()
 
-        changed = True
-        while changed:
-            changed = False
-            new_pairs = set()
-            for (A, B) in unit_pairs:
-                for (C, D) in unit_pairs:
-                    if B == C and (A, D) not in unit_pairs:
-                        new_pairs.add((A, D))
-                        changed = True
-            unit_pairs.update(new_pairs)
-
-        new_productions = {var: [] for var in self.variables}
-        for A in self.variables:
-            for rule in self.productions.get(A, []):
-                if not (len(rule) == 1 and rule[0] in self.variables):
-                    new_productions[A].append(rule)
-
-        for (A, B) in unit_pairs:
-            for rule in self.productions.get(B, []):
-                if not (len(rule) == 1 and rule[0] in self.variables):
-                    if rule not in new_productions[A]:
-                        new_productions[A].append(rule)
-
-        self.productions = new_productions
+        def is_unit(rule):
+            return len(rule) == 1 and rule[0] in variables
+
+        # Only the start symbol keeps ε: reaching it through a unit rule must not
+        # make another variable nullable, as IncrementalCNF does too.
+        start = store.intern(self.start_symbol)
+        epsilon_rule = (store.epsilon,)
+        new_store = store.spawn()
+        heads = [var for var in store.rules if var in variables]
+        heads += [var for var in variables if var not in store.rules]
+        for A in heads:
+            new_store.add_head(A)
+            for B in [A] + closure[A]:
+                for rule in store.rules.get(B, ()):
+                    if not is_unit(rule) and (A == start or rule != epsilon_rule):
+                        new_store.add(A, rule)
+
+        self.store = new_store
 
     def eliminate_inaccessible_symbols(self):
-        reachable = set()
-        to_process = {self.start_symbol}
+        store = self.store
+        symbols = self._ids(self.variables) | self._ids(self.terminals)
+        start = store.intern(self.start_symbol)
+        reachable = {start}
+        to_process = [start]
 
         while to_process:
             symbol = to_process.pop()
-            if symbol in reachable:
-                continue
-            reachable.add(symbol)
-            for rule in self.productions.get(symbol, []):
+            for rule in store.rules.get(symbol, ()):
                 for sym in rule:
-                    if sym in self.variables or sym in self.terminals:
-                        to_process.add(sym)
+                    if sym in symbols and sym not in reachable:
+                        reachable.add(sym)
+                        to_process.append(sym)
 
-        self.variables = self.variables & reachable
-        self.productions = {
-            var: rules for var, rules in self.productions.items() if var in reachable
-        }
+        self.variables = self.variables & self._names(reachable)
+        for var in [var for var in store.rules if var not in reachable]:
+            store.remove_head(var)
 
     def eliminate_nonproductive_symbols(self):
-        productive = set()
+        store = self.store
+        productive = self._productive_ids()
+        allowed = productive | self._ids(self.terminals) | {store.epsilon}
 
-        changed = True
-        while changed:
-            changed = False
-            for var, rules in self.productions.items():
-                if var in productive:
-                    continue
+        self.variables = self.variables & self._names(productive)
+        new_store = store.spawn()
+        for var, rules in store.rules.items():
+            if var in productive:
+                new_store.add_head(var)
                 for rule in rules:
-                    if all(sym in self.terminals or sym in productive for sym in rule):
-                        productive.add(var)
-                        changed = True
-                        break
-
-        self.variables = self.variables & productive
-        new_productions = {}
-        for var in productive:
-            new_rules = []
-            for rule in self.productions.get(var, []):
-                if all(sym in self.terminals or sym in productive for sym in rule):
-                    new_rules.append(rule)
-            new_productions[var] = new_rules
+                    if all(sym in allowed for sym in rule):
+                        new_store.add(var, rule)
 
-        self.productions = new_productions
+        self.store = new_store
 
-    def to_cnf(self):
+    def to_cnf(self, share_pairs: bool = False, greedy: bool = False):
+        # share_pairs reuses one helper variable per distinct pair instead of one per
+        # prefix; greedy additionally pairs the most frequent adjacent symbols first.
+        store = self.store
+        terminals = self._ids(self.terminals)
         terminal_map = {}
-        new_productions = {}
+        new_store = store.spawn()
 
-        for var, rules in self.productions.items():
+        for var, rules in store.rules.items():
             new_rules = []
             for rule in rules:
-                if len(rule) > 1:
+                if len(rule) > 1 and any(sym in terminals for sym in rule):
                     new_rule = []
                     for symbol in rule:
-                        if symbol in self.terminals:
+                        if symbol in terminals:
                             if symbol not in terminal_map:
-                                new_var = self._get_new_variable()
+                                new_var = store.intern(self._get_new_variable())
+                                self.variables.add(store.names[new_var])
                                 terminal_map[symbol] = new_var
-                                self.variables.add(new_var)
-                                new_productions[new_var] = [[symbol]]
+                                new_store.add(new_var, (symbol,))
                             new_rule.append(terminal_map[symbol])
                         else:
                             new_rule.append(symbol)
-                    new_rules.append(new_rule)
-                else:
-                    new_rules.append(rule)
-            new_productions[var] = new_rules
+                    rule = tuple(new_rule)
+                new_rules.append(rule)
+            new_store.add_head(var)
+            for rule in new_rules:
+                new_store.add(var, rule)
+
+        self.store = self._binarize(new_store, share_pairs or greedy, greedy)
+
+    def grammar_size(self) -> Tuple[int, int, int]:
+        # (nonterminals, productions, total right-hand side symbols)
+        rules = self.store.rules
+        return len(rules), len(self.store), sum(len(rule) for heads in rules.values() for rule in heads)
 
-        final_productions = {}
-        for var, rules in new_productions.items():
+    def _binarize(self, store: ProductionStore, share: bool = False, greedy: bool = False) -> ProductionStore:
+        # A → X1 X2 ... Xk becomes a left-nested chain of two-symbol rules.
+        final_store = store.spawn()
+        pairs: Dict[Tuple[int, int], int] = {}
+        if share:
+            # variables whose only rule is a pair can stand in for that pair
+            for rule, heads in store.by_rhs.items():
+                if len(rule) == 2:
+                    for head in heads:
+                        if len(store.rules[head]) == 1:
+                            pairs.setdefault(rule, head)
+
+        def pair_variable(pair: Tuple[int, int]) -> int:
+            if share and pair in pairs:
+                return pairs[pair]
+            new_var = store.intern(self._get_new_variable())
+            self.variables.add(store.names[new_var])
+            final_store.add(new_var, pair)
+            if share:
+                pairs[pair] = new_var
+            return new_var
+
+        productions = {var: list(rules) for var, rules in store.rules.items()}
+        if greedy:
+            self._pair_most_frequent(productions, pair_variable)
+
+        for var, rules in productions.items():
             final_rules = []
             for rule in rules:
-                while len(rule) > 2:
-                    new_var = self._get_new_variable()
-                    self.variables.add(new_var)
-                    final_productions[new_var] = [[rule[0], rule[1]]]
-                    rule = [new_var] + rule[2:]
+                if len(rule) > 2:
+                    left = rule[0]
+                    for sym in rule[1:-1]:
+                        left = pair_variable((left, sym))
+                    rule = (left, rule[-1])
                 final_rules.append(rule)
-            final_productions[var] = final_rules
+            final_store.add_head(var)
+            for rule in final_rules:
+                final_store.add(var, rule)
+        return final_store
+
+    def _pair_most_frequent(self, productions: Dict[int, List[Tuple[int, ...]]], pair_variable):
+        # Re-Pair style: replace the most frequent adjacent pair in the long rules with a
+        # helper variable until no pair occurs twice. occurrences maps a pair to the long
+        # rules containing it, so each round only rewrites the rules it touches.
+        long_rules = [
+            (var, index) for var, rules in productions.items()
+            for index, rule in enumerate(rules) if len(rule) > 2
+        ]
+        occurrences: Dict[Tuple[int, int], Set[int]] = {}
+        counts: Dict[Tuple[int, int], int] = {}
+
+        def count(position: int, sign: int):
+            var, index = long_rules[position]
+            rule = productions[var][index]
+            if len(rule) <= 2:
+                return
+            for pair in zip(rule, rule[1:]):
+                counts[pair] = counts.get(pair, 0) + sign
+                if sign > 0:
+                    occurrences.setdefault(pair, set()).add(position)
 
-        self.productions = final_productions
+        for position in range(len(long_rules)):
+            count(position, 1)
+
+        while counts:
+            pair = max(counts, key=counts.get)
+            if counts[pair] < 2:
+                break
+            new_var = pair_variable(pair)
+            for position in occurrences.pop(pair):
+                var, index = long_rules[position]
+                rule = productions[var][index]
+                if len(rule) <= 2:
+                    continue
+                count(position, -1)
+                rewritten = []
+                i = 0
+                while i < len(rule):
+                    if i + 1 < len(rule) and (rule[i], rule[i + 1]) == pair:
+                        rewritten.append(new_var)
+                        i += 2
+                    else:
+                        rewritten.append(rule[i])
+                        i += 1
+                productions[var][index] = tuple(rewritten)
+                count(position, 1)
+            for stale in [pair for pair, total in counts.items() if total <= 0]:
+                del counts[stale]
 
     def _get_new_variable(self) -> str:
         while True:
@@ -168,43 +576,661 @@ class CFG:
                 return candidate
 
     def display(self):
-        for var in self.productions:
-            rule_strs = [''.join(rule) for rule in self.productions[var]]
+        for var, rules in self.productions.items():
+            rule_strs = [''.join(rule) for rule in rules]
             print(f"{var} → {' | '.join(rule_strs)}")
 
-variables = {'S', 'A', 'B', 'C', 'E'}
-terminals = {'a', 'b'}
-productions = {
-    'S': [['b', 'A', 'C'], ['B']],
-    'A': [['a'], ['a', 'S'], ['b', 'C', 'a', 'C', 'b']],
-    'B': [['A', 'C'], ['b', 'S'], ['a', 'A', 'a']],
-    'C': [['ε'], ['A', 'B']],
-    'E': [['B', 'A']]
-}
-start_symbol = 'S'
-
-'''
-variables = {'S', 'A', 'B', 'C', 'D', 'E'}
-terminals = {'a', 'b'}
-productions = {
-    'S': [['a', 'B'], ['A', 'C']],
-    'A': [['a'], ['A', 'S', 'C'], ['B', 'C'], ['a', 'D']],
-    'B': [['b'], ['b', 'S']],
-    'C': [['ε'], ['B', 'A']],
-    'D': [['a', 'b', 'C']],
-    'E': [['a', 'B']]
-}
-start_symbol = 'S'
-'''
-
-cfg = CFG(variables, terminals, productions, start_symbol)
-
-print("Initial Grammar Productions:")
-cfg.display()
-cfg.eliminate_epsilon_productions()
-cfg.eliminate_unit_productions()
-cfg.eliminate_inaccessible_symbols()
-cfg.eliminate_nonproductive_symbols()
-cfg.to_cnf()
-print("\nCNF Productions:")
-cfg.display()
\ No newline at end of file
+class IncrementalCNF:
+    # Keeps the CNF of a grammar in sync with single production edits. Every stage of
+    # the CFG pipeline is kept per nonterminal: the ε-free rules of each head, its unit
+    # closure and the rules it ends up with, reachable and productive sets, and the
+    # converted rules. An edit only recomputes the heads whose inputs changed. Helper
+    # variables are shared per pair and per terminal and dropped once nothing uses them.
+    def __init__(self, cfg: CFG):
+        self.terminals = set(cfg.terminals)
+        self.start_symbol = cfg.start_symbol
+        self.source = cfg.store.spawn()
+        source = self.source
+        self.start = source.intern(cfg.start_symbol)
+        self.terminal_ids = self._ids(self.terminals)
+
+        self.nullable = _Saturation(lambda sym: sym != source.epsilon)
+        self.productive = _Saturation(self._is_variable)
+        self.reachable = _Reachability(self.start, self._is_variable)
+        self.epsilon_free: Dict[int, Set[Tuple[int, ...]]] = {}
+        self.units: Dict[int, Set[int]] = {}
+        self.unit_parents: Dict[int, Set[int]] = {}
+        self.normalized: Dict[int, Set[Tuple[int, ...]]] = {}
+        self.converted: Dict[int, Dict[Tuple[int, ...], Tuple[int, ...]]] = {}
+
+        self.cnf = CFG(set(), set(cfg.terminals), {}, cfg.start_symbol)
+        self.cnf.store = source.spawn()
+        self.helper_rules: Dict[int, Tuple[int, ...]] = {}
+        self.helper_refs: Dict[int, int] = {}
+        self.pair_helpers: Dict[Tuple[int, int], int] = {}
+        self.terminal_helpers: Dict[int, int] = {}
+        self.new_var_counter = 1
+
+        for var in cfg.variables:
+            source.add_head(source.intern(var))
+        for var, rules in cfg.store.rules.items():
+            source.add_head(var)
+            for rule in rules:
+                source.add(var, rule)
+                self.nullable.add(var, rule)
+        self._update(set(source.rules))
+
+    def _ids(self, symbols) -> Set[int]:
+        return {self.source.intern(sym) for sym in symbols}
+
+    def _is_variable(self, sym: int) -> bool:
+        return sym != self.source.epsilon and sym not in self.terminal_ids
+
+    def _encode(self, var: str, rule: Sequence[str]) -> Tuple[int, Tuple[int, ...]]:
+        if var in self.terminals or var == 'ε':
+            raise ValueError(f"{var} is not a variable")
+        head = self.source.intern(var)
+        encoded = self.source.encode(rule or ['ε'])
+        for sym in (head,) + encoded:
+            if sym in self.helper_rules:
+                raise ValueError(f"{self.source.names[sym]} is a helper variable of the CNF grammar")
+        return head, encoded
+
+    def add(self, var: str, rule: Sequence[str]) -> bool:
+        head, rule = self._encode(var, rule)
+        self.source.add_head(head)
+        if not self.source.add(head, rule):
+            return False
+        self._update({head} | self._rules_using(self.nullable.add(head, rule)))
+        return True
+
+    def remove(self, var: str, rule: Sequence[str]) -> bool:
+        head, rule = self._encode(var, rule)
+        if not self.source.discard(head, rule):
+            return False
+        self._update({head} | self._rules_using(self.nullable.remove(head, rule)))
+        return True
+
+    def _rules_using(self, symbols: Set[int]) -> Set[int]:
+        return {head for sym in symbols for head, _ in self.nullable.occurrences.get(sym, ())}
+
+    def _update(self, dirty: Set[int]):
+        # ε elimination for the dirty heads, then every head whose unit closure passes
+        # through one that changed gets its final rules recomputed.
+        changed = {}
+        for head in dirty:
+            rules = self._without_epsilon(head)
+            if rules != self.epsilon_free.get(head, set()):
+                changed[head] = rules
+        affected = self._unit_ancestors(changed)
+        for head, rules in changed.items():
+            self.epsilon_free[head] = rules
+            units = {rule[0] for rule in rules if len(rule) == 1 and self._is_variable(rule[0])}
+            for target in self.units.get(head, set()) - units:
+                self.unit_parents[target].discard(head)
+            for target in units:
+                self.unit_parents.setdefault(target, set()).add(head)
+            self.units[head] = units
+        affected |= self._unit_ancestors(changed)
+
+        touched = set()
+        for head in affected:
+            old = self.normalized.get(head, set())
+            new = self._normalize(head)
+            if old == new:
+                continue
+            touched.add(head)
+            self.normalized[head] = new
+            for rule in old - new:
+                touched |= self.productive.remove(head, rule)
+                touched |= self.reachable.remove(head, rule)
+            for rule in new - old:
+                touched |= self.productive.add(head, rule)
+                touched |= self.reachable.add(head, rule)
+        # rules mentioning a variable whose productivity changed may be kept or dropped
+        touched |= {head for sym in set(touched) for head, _ in self.productive.occurrences.get(sym, ())}
+        for head in touched:
+            self._convert_head(head)
+
+    def _without_epsilon(self, head: int) -> Set[Tuple[int, ...]]:
+        epsilon = self.source.epsilon
+        nullable = self.nullable.members
+        rules = set()
+        for rule in self.source.rules.get(head, ()):
+            rules |= self.cnf._generate_nullable_variants(rule, nullable, epsilon)
+        if head != self.start:
+            rules.discard((epsilon,))
+        return rules
+
+    def _unit_ancestors(self, heads) -> Set[int]:
+        seen = set(heads)
+        stack = list(heads)
+        while stack:
+            for parent in self.unit_parents.get(stack.pop(), ()):
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+        return seen
+
+    def _normalize(self, head: int) -> Set[Tuple[int, ...]]:
+        # Non-unit rules of the head and of everything in its unit closure.
+        seen = {head}
+        stack = [head]
+        rules = set()
+        while stack:
+            var = stack.pop()
+            for rule in self.epsilon_free.get(var, ()):
+                if len(rule) == 1 and self._is_variable(rule[0]):
+                    if rule[0] not in seen:
+                        seen.add(rule[0])
+                        stack.append(rule[0])
+                else:
+                    rules.add(rule)
+        if head != self.start:
+            rules.discard((self.source.epsilon,))
+        return rules
+
+    def _convert_head(self, head: int):
+        store = self.cnf.store
+        productive = self.productive.members
+        if head in productive and head in self.reachable.members:
+            rules = {
+                rule for rule in self.normalized.get(head, ())
+                if all(sym in productive or not self._is_variable(sym) for sym in rule)
+            }
+        else:
+            rules = set()
+        converted = self.converted.setdefault(head, {})
+        for rule in [rule for rule in converted if rule not in rules]:
+            target = converted.pop(rule)
+            store.discard(head, target)
+            self._release(target)
+        for rule in rules:
+            if rule not in converted:
+                target = converted[rule] = self._convert(rule)
+                store.add(head, target)
+                self._retain(target)
+
+        name = self.source.names[head]
+        if rules:
+            store.add_head(head)
+            self.cnf.variables.add(name)
+        else:
+            store.remove_head(head)
+            self.cnf.variables.discard(name)
+            del self.converted[head]
+
+    def _convert(self, rule: Tuple[int, ...]) -> Tuple[int, ...]:
+        if len(rule) == 1:
+            return rule
+        symbols = [self._terminal_helper(sym) if sym in self.terminal_ids else sym for sym in rule]
+        left = symbols[0]
+        for sym in symbols[1:-1]:
+            left = self._pair_helper((left, sym))
+        return left, symbols[-1]
+
+    def _terminal_helper(self, terminal: int) -> int:
+        helper = self.terminal_helpers.get(terminal)
+        if helper is None:
+            helper = self.terminal_helpers[terminal] = self._new_helper((terminal,))
+        return helper
+
+    def _pair_helper(self, pair: Tuple[int, int]) -> int:
+        helper = self.pair_helpers.get(pair)
+        if helper is None:
+            helper = self.pair_helpers[pair] = self._new_helper(pair)
+            self._retain(pair)
+        return helper
+
+    def _new_helper(self, rule: Tuple[int, ...]) -> int:
+        while True:
+            name = f"X{self.new_var_counter}"
+            self.new_var_counter += 1
+            if name not in self.source.ids:
+                break
+        helper = self.source.intern(name)
+        self.helper_rules[helper] = rule
+        self.helper_refs[helper] = 0
+        self.cnf.store.add(helper, rule)
+        self.cnf.variables.add(name)
+        return helper
+
+    def _retain(self, rule: Tuple[int, ...]):
+        for sym in rule:
+            if sym in self.helper_refs:
+                self.helper_refs[sym] += 1
+
+    def _release(self, rule: Tuple[int, ...]):
+        # A helper goes away with the last rule that uses it, and releases its own rule.
+        stack = list(rule)
+        while stack:
+            sym = stack.pop()
+            if sym not in self.helper_refs:
+                continue
+            self.helper_refs[sym] -= 1
+            if self.helper_refs[sym]:
+                continue
+            helper_rule = self.helper_rules.pop(sym)
+            del self.helper_refs[sym]
+            if len(helper_rule) == 1:
+                del self.terminal_helpers[helper_rule[0]]
+            else:
+                del self.pair_helpers[helper_rule]
+                stack.extend(helper_rule)
+            self.cnf.store.remove_head(sym)
+            self.cnf.variables.discard(self.source.names[sym])
+
+class CYKParser:
+    def __init__(self, cfg: CFG):
+        self.start_symbol = cfg.start_symbol
+        self.symbols = sorted(set(cfg.productions) | {sym for rules in cfg.productions.values() for rule in rules for sym in rule if sym in cfg.variables})
+        self.ids = {var: i for i, var in enumerate(self.symbols)}
+        self.pair_rules: Dict[Tuple[str, str], Set[str]] = {}
+        self.terminal_rules: Dict[str, Set[str]] = {}
+        self.accepts_empty = False
+
+        for var, rules in cfg.productions.items():
+            for rule in rules:
+                if len(rule) == 2 and rule[0] in cfg.variables and rule[1] in cfg.variables:
+                    self.pair_rules.setdefault((rule[0], rule[1]), set()).add(var)
+                elif len(rule) == 1 and rule[0] in cfg.terminals:
+                    self.terminal_rules.setdefault(rule[0], set()).add(var)
+                elif len(rule) == 1 and rule[0] == 'ε' and var == cfg.start_symbol:
+                    self.accepts_empty = True
+                else:
+                    raise ValueError(f"{var} → {''.join(rule)} is not in Chomsky Normal Form, call to_cnf() first")
+
+        # Bitset indexes: a terminal or an RHS pair maps to the mask of the variables
+        # producing it, and pairs are grouped by their left variable.
+        self.terminal_masks = {
+            terminal: self._mask(heads) for terminal, heads in self.terminal_rules.items()
+        }
+        by_left: Dict[int, List[Tuple[int, int]]] = {}
+        for (B, C), heads in self.pair_rules.items():
+            by_left.setdefault(self.ids[B], []).append((self.ids[C], self._mask(heads)))
+        self.pairs_by_left = sorted(by_left.items())
+
+    def _mask(self, variables) -> int:
+        mask = 0
+        for var in variables:
+            mask |= 1 << self.ids[var]
+        return mask
+
+    def _fill(self, word) -> Tuple[List[List[int]], List[List[int]]]:
+        # ends[X][i] has bit j set when X derives word[i:j], starts[X][j] has bit i set.
+        # A cell (i, j) gets A → BC as soon as ends[B][i] & starts[C][j] is non-zero.
+        n = len(word)
+        ends = [[0] * (n + 1) for _ in self.symbols]
+        starts = [[0] * (n + 1) for _ in self.symbols]
+        for i, terminal in enumerate(word):
+            for X in _bits(self.terminal_masks.get(terminal, 0)):
+                ends[X][i] |= 1 << (i + 1)
+                starts[X][i + 1] |= 1 << i
+
+        pairs_by_left = [(ends[B], [(starts[C], mask) for C, mask in rights]) for B, rights in self.pairs_by_left]
+        for length in range(2, n + 1):
+            for i in range(n - length + 1):
+                j = i + length
+                cell = 0
+                for left_ends, rights in pairs_by_left:
+                    left = left_ends[i]
+                    if not left:
+                        continue
+                    for right_starts, mask in rights:
+                        if left & right_starts[j]:
+                            cell |= mask
+                for X in _bits(cell):
+                    ends[X][i] |= 1 << j
+                    starts[X][j] |= 1 << i
+        return ends, starts
+
+    def recognize(self, word) -> bool:
+        if not word:
+            return self.accepts_empty
+        if self.start_symbol not in self.ids:
+            return False
+        ends, _ = self._fill(word)
+        return bool(ends[self.ids[self.start_symbol]][0] >> len(word) & 1)
+
+    def recognize_many(self, words: Sequence, workers: Optional[int] = None, chunksize: Optional[int] = None) -> List[bool]:
+        words = list(words)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(words) < 2:
+            return [self.recognize(word) for word in words]
+        if chunksize is None:
+            chunksize = max(1, -(-len(words) // (workers * 4)))
+        chunks = [words[i:i + chunksize] for i in range(0, len(words), chunksize)]
+        # The tables are pickled once here and loaded once per worker, each task only
+        # ships its chunk of words.
+        with ProcessPoolExecutor(max_workers=workers, initializer=_load_worker_parser, initargs=(pickle.dumps(self),)) as executor:
+            return [result for chunk in executor.map(_recognize_chunk, chunks) for result in chunk]
+
+    def parse(self, word) -> Optional[Dict[Tuple[str, int, int], List[Tuple[str, ...]]]]:
+        if not word:
+            return {(self.start_symbol, 0, 0): [('ε',)]} if self.accepts_empty else None
+        if self.start_symbol not in self.ids:
+            return None
+        ends, starts = self._fill(word)
+        if not ends[self.ids[self.start_symbol]][0] >> len(word) & 1:
+            return None
+
+        # Shared packed forest: (A, i, j) maps to its alternatives, either (terminal,)
+        # or (B, k, C) for the children (B, i, k) and (C, k, j).
+        forest: Dict[Tuple[str, int, int], List[Tuple[str, ...]]] = {}
+        pairs_by_head: Dict[str, List[Tuple[str, str]]] = {}
+        for (B, C), heads in self.pair_rules.items():
+            for A in heads:
+                pairs_by_head.setdefault(A, []).append((B, C))
+        to_process = [(self.start_symbol, 0, len(word))]
+        while to_process:
+            node = to_process.pop()
+            if node in forest:
+                continue
+            A, i, j = node
+            alternatives = forest[node] = []
+            if j - i == 1:
+                alternatives.append((word[i],))
+                continue
+            for B, C in pairs_by_head.get(A, []):
+                for k in _bits(ends[self.ids[B]][i] & starts[self.ids[C]][j]):
+                    alternatives.append((B, k, C))
+                    to_process.append((B, i, k))
+                    to_process.append((C, k, j))
+        return forest
+
+class EarleyParser:
+    # Earley parsing straight from a CFG, no CNF needed. Rules are flattened into
+    # numbered dots and an item is the integer dot * stride + origin. Nullable symbols
+    # are stepped over as items are added (Aycock-Horspool), prediction adds a
+    # precomputed list of dots per nonterminal, and a completion that can only climb a
+    # chain of right-recursive rules jumps straight to the top of it (Leo), which keeps
+    # right recursion linear. key maps a token to its terminal, e.g. a Lab6 Token to its
+    # type name.
+    def __init__(self, cfg: CFG, key: Optional[Callable[[Any], str]] = None):
+        store = cfg.store
+        self.key = key
+        self.start_symbol = cfg.start_symbol
+        self.terminal_ids = {terminal: store.intern(terminal) for terminal in cfg.terminals}
+        variables = cfg._ids(cfg.variables)
+        nullable = cfg._nullable_ids()
+        start = store.intern(cfg.start_symbol)
+        self.names = list(store.names)
+        # the augmented rule S' → S gives the chart a single accepting item
+        augmented = len(self.names)
+        self.names.append(None)
+        if start in nullable:
+            nullable.add(augmented)
+
+        rules = [(augmented, (start,))]
+        rules += [
+            (head, tuple(sym for sym in rule if sym != store.epsilon))
+            for head, heads in store.rules.items() for rule in heads
+        ]
+        self.dot_symbol: List[int] = []
+        self.dot_lhs: List[int] = []
+        self.dot_base: List[int] = []
+        starts: Dict[int, List[int]] = {}
+        for head, rhs in rules:
+            base = len(self.dot_symbol)
+            starts.setdefault(head, []).append(base)
+            self.dot_symbol.extend(rhs + (-1,))
+            self.dot_lhs.extend([head] * (len(rhs) + 1))
+            self.dot_base.extend([base] * (len(rhs) + 1))
+        self.accept_dot = len(rules[0][1])
+        terminals = set(self.terminal_ids.values())
+        self.nonterminals = set(starts) | (variables - terminals)
+
+        # skip[d]: the dots reached from d by stepping over nullable symbols
+        self.skip: List[Tuple[int, ...]] = [()] * len(self.dot_symbol)
+        for d in range(len(self.dot_symbol) - 1, -1, -1):
+            if self.dot_symbol[d] in nullable:
+                self.skip[d] = (d,) + self.skip[d + 1]
+            else:
+                self.skip[d] = (d,)
+        self.penultimate = [
+            sym != -1 and self.dot_symbol[d + 1] == -1 for d, sym in enumerate(self.dot_symbol)
+        ]
+
+        # predict[A]: the first dot of every rule a prediction of A adds, closed over
+        # leftmost nonterminals
+        self.predict: Dict[int, Tuple[int, ...]] = {}
+        self.predicted_with: Dict[int, Set[int]] = {}
+        for A in self.nonterminals:
+            closure = {A}
+            stack = [A]
+            bases = []
+            while stack:
+                for base in starts.get(stack.pop(), ()):
+                    bases.append(base)
+                    for d in self.skip[base]:
+                        sym = self.dot_symbol[d]
+                        if sym in self.nonterminals and sym not in closure:
+                            closure.add(sym)
+                            stack.append(sym)
+            self.predict[A] = tuple(bases)
+            self.predicted_with[A] = closure
+
+        # empty derivations of the nullable variables, for items that stepped over them
+        self.empty_trees: Dict[int, Tuple[str, list]] = {}
+        changed = True
+        while changed:
+            changed = False
+            for head, rhs in rules:
+                if head not in self.empty_trees and all(sym in self.empty_trees for sym in rhs):
+                    self.empty_trees[head] = (self.names[head], [self.empty_trees[sym] for sym in rhs])
+                    changed = True
+
+    def _terminals(self, tokens) -> List[int]:
+        key = self.key
+        ids = self.terminal_ids
+        if key is None:
+            return [ids.get(token, -2) for token in tokens]
+        return [ids.get(key(token), -2) for token in tokens]
+
+    def _chart(self, terminals: List[int], links: bool):
+        # Returns the item sets, the items waiting on each symbol per set and, with
+        # links, a back pointer per item: (set of the item one dot back, child), where
+        # the child is the completed item, -2 for a token, -1 for an empty derivation,
+        # or set -1 when the item is the top of a Leo chain started by the child.
+        n = len(terminals)
+        stride = n + 1
+        dot_symbol, dot_lhs, skip = self.dot_symbol, self.dot_lhs, self.skip
+        predict, predicted_with, nonterminals = self.predict, self.predicted_with, self.nonterminals
+        sets: List[Set[int]] = []
+        waiting_sets: List[Dict[int, List[int]]] = []
+        backs: List[Dict[int, Tuple[int, int]]] = []
+        leo: List[Dict[int, Optional[int]]] = []
+
+        for i in range(n + 1):
+            items = set()
+            waiting = {}
+            back = {}
+            worklist = []
+            predicted = set()
+            sets.append(items)
+            waiting_sets.append(waiting)
+            backs.append(back)
+            leo.append({})
+
+            def advance(dots, origin, previous, child):
+                for d in dots:
+                    item = d * stride + origin
+                    if item not in items:
+                        items.add(item)
+                        worklist.append(item)
+                        if links:
+                            back[item] = (previous, child)
+                    previous, child = i, -1
+
+            if i == 0:
+                advance(skip[0], 0, None, None)
+            else:
+                for item in waiting_sets[i - 1].get(terminals[i - 1], ()):
+                    dot, origin = divmod(item, stride)
+                    advance(skip[dot + 1], origin, i - 1, -2)
+
+            while worklist:
+                item = worklist.pop()
+                dot, origin = divmod(item, stride)
+                sym = dot_symbol[dot]
+                if sym == -1:
+                    # empty completions were already stepped over when predicted
+                    if origin == i:
+                        continue
+                    A = dot_lhs[dot]
+                    top = self._leo_top(leo, waiting_sets, stride, origin, A)
+                    if top is not None:
+                        advance((top // stride,), top % stride, -1, item)
+                    else:
+                        for waiting_item in waiting_sets[origin].get(A, ()):
+                            wd, wo = divmod(waiting_item, stride)
+                            advance(skip[wd + 1], wo, origin, item)
+                else:
+                    waiting.setdefault(sym, []).append(item)
+                    if sym in nonterminals and sym not in predicted:
+                        predicted |= predicted_with[sym]
+                        for base in predict[sym]:
+                            advance(skip[base], i, None, None)
+
+            if i < n and terminals[i] not in waiting:
+                break
+        return sets, waiting_sets, backs
+
+    def _leo_top(self, leo, waiting_sets, stride: int, j: int, sym: int) -> Optional[int]:
+        # Climbs while the only item waiting on sym in set j has sym as its last symbol,
+        # memoizing the top completed item for every (set, symbol) on the way.
+        path = []
+        seen = set()
+        top = None
+        while True:
+            memo = leo[j]
+            if sym in memo:
+                top = memo[sym]
+                break
+            waiting = waiting_sets[j].get(sym, ())
+            if len(waiting) != 1 or (j, sym) in seen:
+                memo[sym] = None
+                break
+            dot, origin = divmod(waiting[0], stride)
+            if not self.penultimate[dot]:
+                memo[sym] = None
+                break
+            seen.add((j, sym))
+            path.append((j, sym, (dot + 1) * stride + origin))
+            j, sym = origin, self.dot_lhs[dot]
+        for j, sym, candidate in reversed(path):
+            if top is None:
+                top = candidate
+            leo[j][sym] = top
+        return top
+
+    def recognize(self, tokens) -> bool:
+        terminals = self._terminals(tokens)
+        sets, _, _ = self._chart(terminals, False)
+        return len(sets) == len(terminals) + 1 and self.accept_dot * (len(terminals) + 1) in sets[-1]
+
+    def parse(self, tokens) -> Optional[Tuple[str, list]]:
+        # Returns one parse tree as (variable, children) with the tokens as leaves, or
+        # None when the tokens are not in the language.
+        tokens = list(tokens)
+        terminals = self._terminals(tokens)
+        n = len(terminals)
+        stride = n + 1
+        sets, waiting_sets, backs = self._chart(terminals, True)
+        accept = self.accept_dot * stride
+        if len(sets) != n + 1 or accept not in sets[n]:
+            return None
+
+        dot_symbol, dot_lhs, dot_base, names = self.dot_symbol, self.dot_lhs, self.dot_base, self.names
+        root = [None]
+        # each task fills children[index] with the tree of a completed item
+        tasks = [(accept, n, root, 0)]
+
+        def prefix(item, k, children, tasks):
+            # walks the back pointers of item, filling children right to left
+            index = item // stride - dot_base[item // stride]
+            while index:
+                index -= 1
+                previous, child = backs[k][item]
+                if child == -2:
+                    children[index] = tokens[k - 1]
+                elif child == -1:
+                    children[index] = self.empty_trees[dot_symbol[item // stride - 1]]
+                else:
+                    tasks.append((child, k, children, index))
+                item -= stride
+                k = previous
+
+        while tasks:
+            item, k, parent, slot = tasks.pop()
+            dot, origin = divmod(item, stride)
+            previous, child = backs[k][item]
+            if previous != -1:
+                children = [None] * (dot - dot_base[dot])
+                node = (names[dot_lhs[dot]], children)
+                prefix(item, k, children, tasks)
+            else:
+                # rebuild the skipped chain bottom up from the completion that started it
+                A, j = dot_lhs[child // stride], child % stride
+                node = None
+                while True:
+                    waiting_dot, waiting_origin = divmod(waiting_sets[j][A][0], stride)
+                    children = [None] * (waiting_dot + 1 - dot_base[waiting_dot])
+                    prefix(waiting_dot * stride + waiting_origin, j, children, tasks)
+                    if node is None:
+                        tasks.append((child, k, children, len(children) - 1))
+                    else:
+                        children[-1] = node
+                    A, j = dot_lhs[waiting_dot], waiting_origin
+                    node = (names[A], children)
+                    if (A, j) == (dot_lhs[dot], origin):
+                        break
+            parent[slot] = node
+        return root[0][1][0]
+
+_worker_parser: Optional[CYKParser] = None
+
+def _load_worker_parser(payload: bytes):
+    global _worker_parser
+    _worker_parser = pickle.loads(payload)
+
+def _recognize_chunk(words: List) -> List[bool]:
+    return [_worker_parser.recognize(word) for word in words]
+
+if __name__ == "__main__":
+    variables = {'S', 'A', 'B', 'C', 'E'}
+    terminals = {'a', 'b'}
+    productions = {
+        'S': [['b', 'A', 'C'], ['B']],
+        'A': [['a'], ['a', 'S'], ['b', 'C', 'a', 'C', 'b']],
+        'B': [['A', 'C'], ['b', 'S'], ['a', 'A', 'a']],
+        'C': [['ε'], ['A', 'B']],
+        'E': [['B', 'A']]
+    }
+    start_symbol = 'S'
+
+    '''
+    variables = {'S', 'A', 'B', 'C', 'D', 'E'}
+    terminals = {'a', 'b'}
+    productions = {
+        'S': [['a', 'B'], ['A', 'C']],
+        'A': [['a'], ['A', 'S', 'C'], ['B', 'C'], ['a', 'D']],
+        'B': [['b'], ['b', 'S']],
+        'C': [['ε'], ['B', 'A']],
+        'D': [['a', 'b', 'C']],
+        'E': [['a', 'B']]
+    }
+    start_symbol = 'S'
+    '''
+
+    cfg = CFG(variables, terminals, productions, start_symbol)
+
+    print("Initial Grammar Productions:")
+    cfg.display()
+    cfg.eliminate_epsilon_productions()
+    cfg.eliminate_unit_productions()
+    cfg.eliminate_inaccessible_symbols()
+    cfg.eliminate_nonproductive_symbols()
+    cfg.to_cnf()
+    print("\nCNF Productions:")
+    cfg.display()
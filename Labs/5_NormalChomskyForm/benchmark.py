@@ -0,0 +1,321 @@
+import os
+import random
+import sys
+import time
+
+from Lab5 import CFG, CYKParser, EarleyParser
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '6_ParserASTBuild'))
+from Lab6 import TokenType, tokenize
+
+def dyck_cfg():
+    # Balanced brackets: S → SS | aSb | ab
+    productions = {'S': [['S', 'S'], ['a', 'S', 'b'], ['a', 'b']]}
+    cfg = CFG({'S'}, {'a', 'b'}, productions, 'S')
+    cfg.eliminate_epsilon_productions()
+    cfg.eliminate_unit_productions()
+    cfg.eliminate_inaccessible_symbols()
+    cfg.eliminate_nonproductive_symbols()
+    cfg.to_cnf()
+    return cfg
+
+def dyck_word(length, rng):
+    word = []
+    opened = 0
+    for position in range(length):
+        remaining = length - position
+        if opened == 0 or (opened < remaining and rng.random() < 0.5):
+            word.append('a')
+            opened += 1
+        else:
+            word.append('b')
+            opened -= 1
+    return ''.join(word)
+
+def naive_cyk(cfg, word):
+    # Textbook CYK: sets of variables per cell, nested loops over splits and rules.
+    productions = cfg.productions
+    n = len(word)
+    table = [[set() for _ in range(n + 1)] for _ in range(n + 1)]
+    for i, terminal in enumerate(word):
+        for var, rules in productions.items():
+            if [terminal] in rules:
+                table[i][i + 1].add(var)
+    for length in range(2, n + 1):
+        for i in range(n - length + 1):
+            j = i + length
+            for k in range(i + 1, j):
+                for var, rules in productions.items():
+                    for rule in rules:
+                        if len(rule) == 2 and rule[0] in table[i][k] and rule[1] in table[k][j]:
+                            table[i][j].add(var)
+    return cfg.start_symbol in table[0][n]
+
+def batch_scaling(parser, rng, count=10_000, length=40):
+    words = [dyck_word(length, rng) if i % 2 else ''.join(rng.choice('ab') for _ in range(length)) for i in range(count)]
+    print(f"\nBatch of {count:,} words of length {length}")
+    print(f"{'workers':>7} {'seconds':>9} {'words/s':>10} {'speed-up':>9}")
+    expected = None
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        results, elapsed = timed(parser.recognize_many, words, workers)
+        expected = expected or results
+        assert results == expected
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>9.3f} {count / elapsed:>10,.0f} {baseline / elapsed:>8.2f}x")
+
+def generated_cfg(variable_count, rules_per_variable=10, seed=0):
+    rng = random.Random(seed)
+    variables = [f"V{i}" for i in range(variable_count)]
+    terminals = ['a', 'b', 'c']
+    productions = {}
+    for i, var in enumerate(variables):
+        rules = []
+        for _ in range(rules_per_variable):
+            roll = rng.random()
+            if roll < 0.005:
+                rules.append(['ε'])
+            elif roll < 0.1 and i % 8 != 7:
+                # unit chains stay inside blocks of 8 so the closures remain small
+                rules.append([variables[min(i | 7, i + rng.randint(1, 3), variable_count - 1)]])
+            else:
+                # a leading terminal keeps nullability and unit chains from spreading
+                rules.append([rng.choice(terminals)] +
+                             [rng.choice(terminals) if rng.random() < 0.5 else rng.choice(variables)
+                              for _ in range(rng.randint(0, 3))])
+        productions[var] = rules
+    return CFG(set(variables), set(terminals), productions, variables[0])
+
+def legacy_nullable(cfg, productions):
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for var, rules in productions.items():
+            for rule in rules:
+                if all(sym in nullable or sym == 'ε' for sym in rule):
+                    if var not in nullable:
+                        nullable.add(var)
+                        changed = True
+    return nullable
+
+def legacy_unit_pairs(cfg, productions):
+    unit_pairs = set()
+    for A in cfg.variables:
+        for rule in productions.get(A, []):
+            if len(rule) == 1 and rule[0] in cfg.variables:
+                unit_pairs.add((A, rule[0]))
+    changed = True
+    while changed:
+        changed = False
+        new_pairs = set()
+        for (A, B) in unit_pairs:
+            for (C, D) in unit_pairs:
+                if B == C and (A, D) not in unit_pairs:
+                    new_pairs.add((A, D))
+                    changed = True
+        unit_pairs.update(new_pairs)
+    return unit_pairs
+
+def legacy_productive(cfg, productions):
+    productive = set()
+    changed = True
+    while changed:
+        changed = False
+        for var, rules in productions.items():
+            if var in productive:
+                continue
+            for rule in rules:
+                if all(sym in cfg.terminals or sym in productive for sym in rule):
+                    productive.add(var)
+                    changed = True
+                    break
+    return productive
+
+def normalization_passes(largest):
+    print("\nNormalization passes on generated grammars (seconds)")
+    print(f"{'variables':>9} {'productions':>11} {'nullable':>17} {'unit closure':>17} {'productive':>17} "
+          f"{'ε pass':>7} {'unit pass':>9} {'useless':>8}")
+    for variable_count in (500, 2_000, 10_000, 20_000):
+        if variable_count > largest:
+            break
+        cfg = generated_cfg(variable_count)
+        productions = cfg.productions
+        production_count = len(cfg.store)
+        columns = []
+        for legacy, current in ((legacy_nullable, cfg._find_nullable),
+                                (legacy_unit_pairs, cfg._unit_closure),
+                                (legacy_productive, cfg._find_productive)):
+            before = f"{timed(legacy, cfg, productions)[1]:.3f}" if variable_count <= 2_000 else "-"
+            columns.append(f"{before:>7} → {timed(current)[1]:.3f}")
+        _, epsilon_time = timed(cfg.eliminate_epsilon_productions)
+        _, unit_time = timed(cfg.eliminate_unit_productions)
+        _, useless_time = timed(lambda: (cfg.eliminate_inaccessible_symbols(), cfg.eliminate_nonproductive_symbols()))
+        print(f"{variable_count:>9,} {production_count:>11,} {columns[0]:>17} {columns[1]:>17} {columns[2]:>17} "
+              f"{epsilon_time:>7.2f} {unit_time:>9.2f} {useless_time:>8.2f}")
+
+def nullable_chain_cfg(length):
+    # S → A1 A2 ... Ak with every Ai → a | ε: 2^k variants of the single S rule
+    variables = [f"A{i}" for i in range(1, length + 1)]
+    productions = {'S': [variables[:]]}
+    for var in variables:
+        productions[var] = [['a'], ['ε']]
+    return CFG({'S', *variables}, {'a'}, productions, 'S')
+
+def nullable_chains():
+    print("\nε elimination on S → A1..Ak with nullable Ai (seconds, productions after the pass)")
+    print(f"{'k':>6} {'subsets':>9} {'rules':>9} {'binarized':>10} {'rules':>7}")
+    for length in (4, 8, 12, 16, 100, 1_000, 10_000):
+        if length <= 16:
+            cfg = nullable_chain_cfg(length)
+            _, elapsed = timed(cfg.eliminate_epsilon_productions)
+            subsets = f"{elapsed:9.3f} {len(cfg.store):>9,}"
+        else:
+            subsets = f"{'-':>9} {'-':>9}"
+        cfg = nullable_chain_cfg(length)
+        _, elapsed = timed(cfg.eliminate_epsilon_productions, True)
+        print(f"{length:>6,} {subsets} {elapsed:>10.3f} {len(cfg.store):>7,}")
+
+def long_rule_cfg(variable_count, rules_per_variable=5, seed=0):
+    # Long rules drawn from a small pool of popular variables, so the same pairs
+    # recur across many rules.
+    rng = random.Random(seed)
+    variables = [f"V{i}" for i in range(variable_count)]
+    popular = variables[:20]
+    terminals = ['a', 'b']
+    productions = {}
+    for var in variables:
+        rules = [[rng.choice(terminals)]]
+        for _ in range(rules_per_variable - 1):
+            rules.append([rng.choice(popular) if rng.random() < 0.8 else rng.choice(terminals)
+                          for _ in range(rng.randint(3, 8))])
+        productions[var] = rules
+    return CFG(set(variables), set(terminals), productions, variables[0])
+
+def shared_binarization(largest, rng):
+    print("\nto_cnf binarization on long-rule grammars (nonterminals / productions, seconds)")
+    print(f"{'variables':>9} {'mode':>7} {'nonterminals':>12} {'productions':>11} {'symbols':>9} {'to_cnf s':>9} {'CYK s':>7}")
+    for variable_count in (100, 1_000, 10_000):
+        if variable_count > largest:
+            break
+        words = [''.join(rng.choice('ab') for _ in range(30)) for _ in range(20)]
+        for mode, options in (("fresh", {}), ("shared", {'share_pairs': True}), ("greedy", {'greedy': True})):
+            cfg = long_rule_cfg(variable_count)
+            _, elapsed = timed(lambda: cfg.to_cnf(**options))
+            nonterminals, productions, symbols = cfg.grammar_size()
+            parser = CYKParser(cfg)
+            _, parse_time = timed(lambda: [parser.recognize(word) for word in words])
+            print(f"{variable_count:>9,} {mode:>7} {nonterminals:>12,} {productions:>11,} {symbols:>9,} {elapsed:>9.3f} {parse_time:>7.3f}")
+
+def full_pipeline(cfg):
+    cfg.eliminate_epsilon_productions()
+    cfg.eliminate_unit_productions()
+    cfg.eliminate_inaccessible_symbols()
+    cfg.eliminate_nonproductive_symbols()
+    cfg.to_cnf()
+
+def incremental_edits(largest, edits=200):
+    print(f"\nIncremental CNF over {edits} alternating add/remove edits (seconds per edit)")
+    print(f"{'variables':>9} {'productions':>11} {'maintain':>9} {'full pass':>10} {'add':>9} {'remove':>9}")
+    for variable_count in (500, 2_000, 10_000, 20_000):
+        if variable_count > largest:
+            break
+        rng = random.Random(variable_count)
+        cfg = generated_cfg(variable_count)
+        production_count = len(cfg.store)
+        _, full_time = timed(full_pipeline, generated_cfg(variable_count))
+        _, maintain_time = timed(cfg.maintain_cnf)
+        variables = sorted(cfg.variables)
+        rules = [[rng.choice('abc'), rng.choice(variables), rng.choice(variables)] for _ in range(edits)]
+        heads = [rng.choice(variables) for _ in range(edits)]
+        _, add_time = timed(lambda: [cfg.add_production(var, rule) for var, rule in zip(heads, rules)])
+        _, remove_time = timed(lambda: [cfg.remove_production(var, rule) for var, rule in zip(heads, rules)])
+        print(f"{variable_count:>9,} {production_count:>11,} {maintain_time:>9.3f} {full_time:>10.3f} "
+              f"{add_time / edits:>9.5f} {remove_time / edits:>9.5f}")
+
+def expression_cfg():
+    # The Lab6 expression language, with Lab6 token types (and operator values) as terminals
+    productions = {
+        'E': [['E', '+', 'T'], ['E', '-', 'T'], ['T']],
+        'T': [['T', '*', 'F'], ['T', '/', 'F'], ['F']],
+        'F': [['P', '^', 'F'], ['P']],
+        'P': [['NUMBER'], ['FLOAT'], ['CONSTANT'], ['IDENTIFIER'], ['-', 'P'], ['LPAREN', 'E', 'RPAREN'],
+              ['ABS', 'E', 'ABS'], ['TRIG', 'LPAREN', 'E', 'RPAREN'], ['LOG', 'LPAREN', 'E', 'RPAREN']],
+    }
+    terminals = {'+', '-', '*', '/', '^', 'NUMBER', 'FLOAT', 'CONSTANT', 'IDENTIFIER',
+                 'LPAREN', 'RPAREN', 'ABS', 'TRIG', 'LOG'}
+    return CFG({'E', 'T', 'F', 'P'}, terminals, productions, 'E')
+
+def token_terminal(token):
+    return token.value if token.type == TokenType.OPERATOR else token.type.name
+
+def expression_source(terms, rng):
+    parts = []
+    for i in range(terms):
+        if i:
+            parts.append(rng.choice(['+', '-', '*', '/', '^']))
+        roll = rng.random()
+        if roll < 0.1:
+            parts.append(f"sin({rng.randint(0, 9)} + x)")
+        elif roll < 0.2:
+            parts.append(f"|y - {rng.random():.2f}|")
+        else:
+            parts.append(rng.choice(['x', 'pi', '2', '3.5']))
+    return ' '.join(parts)
+
+def earley_parsing(largest, rng):
+    print("\nEarley parsing without CNF (seconds)")
+    cfg = expression_cfg()
+    parser = EarleyParser(cfg, key=token_terminal)
+    print(f"{'tokens':>8} {'tokenize':>9} {'recognize':>10} {'parse':>7} {'tokens/s':>10}")
+    for terms in (100, 1_000, 10_000, 50_000):
+        if terms > largest:
+            break
+        tokens, tokenize_time = timed(tokenize, expression_source(terms, rng))
+        member, recognize_time = timed(parser.recognize, tokens)
+        tree, parse_time = timed(parser.parse, tokens)
+        assert member and tree is not None
+        print(f"{len(tokens):>8,} {tokenize_time:>9.3f} {recognize_time:>10.3f} {parse_time:>7.3f} {len(tokens) / recognize_time:>10,.0f}")
+
+    # right recursion stays linear thanks to the Leo items
+    right = CFG({'S'}, {'a'}, {'S': [['a', 'S'], ['a']]}, 'S')
+    parser = EarleyParser(right)
+    print(f"{'S → aS | a':>12} {'recognize':>10} {'parse':>7}")
+    for length in (1_000, 10_000, 100_000):
+        if length > largest * 2:
+            break
+        word = 'a' * length
+        _, recognize_time = timed(parser.recognize, word)
+        _, parse_time = timed(parser.parse, word)
+        print(f"{length:>12,} {recognize_time:>10.3f} {parse_time:>7.3f}")
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cfg = dyck_cfg()
+    parser = CYKParser(cfg)
+    rng = random.Random(0)
+    print(f"Dyck grammar in CNF: {len(cfg.productions)} variables, {len(cfg.store)} productions")
+    print(f"{'length':>7} {'member':>7} {'naive s':>9} {'bitset s':>9} {'forest s':>9} {'forest nodes':>13}")
+    for length in (10, 50, 100, 200, 500, 1000, 2000):
+        if length > largest:
+            break
+        word = dyck_word(length, rng)
+        member, elapsed = timed(parser.recognize, word)
+        naive = f"{timed(naive_cyk, cfg, word)[1]:9.3f}" if length <= 200 else f"{'-':>9}"
+        forest, forest_elapsed = timed(parser.parse, word)
+        print(f"{length:>7,} {str(member):>7} {naive} {elapsed:>9.3f} {forest_elapsed:>9.3f} {len(forest):>13,}")
+
+    normalization_passes(largest * 10)
+    nullable_chains()
+    shared_binarization(largest * 5, rng)
+    incremental_edits(largest * 10)
+    earley_parsing(largest * 25, rng)
+    batch_scaling(parser, rng)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
+import codecs
+import math
+import operator
+import os
+import pickle
 import re
+from collections import OrderedDict
+from array import array
+from itertools import starmap
 from enum import Enum, auto
 from dataclasses import dataclass
-from typing import List, Union, Optional
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, Union, Optional
 
 class TokenType(Enum):
     FLOAT = auto()
@@ -19,18 +27,60 @@ class TokenType(Enum):
     SKIP = auto()
     MISMATCH = auto()
 
-@dataclass
+@dataclass(frozen=True)
 class Token:
+    __slots__ = ('type', 'value', 'position')
     type: TokenType
     value: Union[str, float, int]
     position: int
 
+    def __reduce__(self):
+        return (Token, (self.type, self.value, self.position))
+
+TOKEN_TYPES = {tok.value: tok for tok in TokenType}
+
+class TokenBuffer:
+    __slots__ = ('source', 'types', 'starts', 'ends')
+
+    def __init__(self, source: str):
+        self.source = source
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        return Token(self.type_at(index), self.value_at(index), self.starts[index])
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.types)):
+            yield self[index]
+
+    def type_at(self, index: int) -> TokenType:
+        return TOKEN_TYPES[self.types[index]]
+
+    def position_at(self, index: int) -> int:
+        return self.starts[index]
+
+    def value_at(self, index: int) -> Union[str, float, int]:
+        value = self.source[self.starts[index]:self.ends[index]]
+        kind = TOKEN_TYPES[self.types[index]]
+        if kind == TokenType.FLOAT:
+            return float(value)
+        elif kind == TokenType.NUMBER:
+            return int(value)
+        elif kind == TokenType.CONSTANT:
+            return 3.141592653589793 if value == 'pi' else 2.718281828459045
+        return value
+
 TOKEN_SPECIFICATION = [
     (TokenType.FLOAT, r'\d+\.\d+'),
     (TokenType.NUMBER, r'\d+'),
-    (TokenType.CONSTANT, r'\b(pi|e)\b'),
-    (TokenType.TRIG, r'\b(sin|cos|tan|csc|sec|cot)\b'),
-    (TokenType.LOG, r'\b(log|ln|sqrt)\b'),
+    (TokenType.CONSTANT, r'(?:pi|e)\b'),
+    (TokenType.TRIG, r'(?:sin|cos|tan|csc|sec|cot)\b'),
+    (TokenType.LOG, r'(?:log|ln|sqrt)\b'),
     (TokenType.IDENTIFIER, r'[a-zA-Z_]\w*'),
     (TokenType.OPERATOR, r'[\+\-\*/\^=]'),
     (TokenType.ABS, r'\|'),
@@ -42,71 +92,180 @@ TOKEN_SPECIFICATION = [
     (TokenType.MISMATCH, r'.'),
 ]
 
+# Tokens are always matched from a token boundary, so the leading \b of the
+# keyword patterns is implied. It is left out on purpose: TOKEN_PATTERN looks
+# behind the scan position, which would turn "2pi" into NUMBER IDENTIFIER.
 TOKEN_REGEX = '|'.join(f'(?P<{tok.name}>{pattern})' for tok, pattern in TOKEN_SPECIFICATION)
+TOKEN_PATTERN = re.compile(TOKEN_REGEX)
+# The text of every token tokenize() keeps, for findall().
+TOKEN_TEXT = re.compile('|'.join(pattern for tok, pattern in TOKEN_SPECIFICATION
+                                 if tok not in (TokenType.NEWLINE, TokenType.SKIP, TokenType.MISMATCH)))
+CHUNK_SIZE = 1 << 16
+# A match is only final once two more characters are known: "3." may still become
+# a FLOAT and "sin" may still grow into an IDENTIFIER.
+LOOKAHEAD = 2
 
 def tokenize(code: str) -> List[Token]:
     tokens = []
+    append = tokens.append
     i = 0
-    while i < len(code):
-        match = re.match(TOKEN_REGEX, code[i:])
-        if not match:
+    for match in TOKEN_PATTERN.finditer(code):
+        if match.start() != i:
             raise SyntaxError(f"Unexpected character {code[i]} at position {i}")
         kind = TokenType[match.lastgroup]
         value = match.group()
+        i = match.end()
         if kind == TokenType.SKIP or kind == TokenType.NEWLINE:
-            i += len(value)
             continue
         elif kind == TokenType.MISMATCH:
-            raise SyntaxError(f"Unexpected character {value} at position {i}")
+            raise SyntaxError(f"Unexpected character {value} at position {match.start()}")
         elif kind == TokenType.FLOAT:
             value = float(value)
         elif kind == TokenType.NUMBER:
             value = int(value)
         elif kind == TokenType.CONSTANT:
             value = 3.141592653589793 if value == 'pi' else 2.718281828459045
-        tokens.append(Token(kind, value, i))
-        i += len(match.group())
+        append(Token(kind, value, match.start()))
+    if i != len(code):
+        raise SyntaxError(f"Unexpected character {code[i]} at position {i}")
     return tokens
 
-@dataclass
+def tokenize_compact(code: str) -> TokenBuffer:
+    buffer = TokenBuffer(code)
+    types, starts, ends = buffer.types, buffer.starts, buffer.ends
+    codes = {tok.name: tok.value for tok in TokenType}
+    skipped = {TokenType.SKIP.value, TokenType.NEWLINE.value}
+    mismatch = TokenType.MISMATCH.value
+    i = 0
+    for match in TOKEN_PATTERN.finditer(code):
+        start = match.start()
+        if start != i:
+            raise SyntaxError(f"Unexpected character {code[i]} at position {i}")
+        kind = codes[match.lastgroup]
+        i = match.end()
+        if kind in skipped:
+            continue
+        elif kind == mismatch:
+            raise SyntaxError(f"Unexpected character {match.group()} at position {start}")
+        types.append(kind)
+        starts.append(start)
+        ends.append(i)
+    if i != len(code):
+        raise SyntaxError(f"Unexpected character {code[i]} at position {i}")
+    return buffer
+
+def _read_chunks(source, chunk_size: int) -> Iterator[str]:
+    if isinstance(source, str):
+        yield source
+        return
+    if hasattr(source, 'read'):
+        chunks = iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        chunks = iter(source)
+    decoder = None
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder('utf-8')()
+        yield decoder.decode(chunk)
+    if decoder is not None:
+        yield decoder.decode(b'', final=True)
+
+def tokenize_stream(source: Union[str, IO, Iterable[Union[str, bytes]]], chunk_size: int = CHUNK_SIZE) -> Iterator[Token]:
+    buffer = ''
+    offset = 0
+    chunks = _read_chunks(source, chunk_size)
+    at_end = False
+    while not at_end:
+        chunk = next(chunks, None)
+        if chunk is None:
+            at_end = True
+        else:
+            buffer += chunk
+        end = len(buffer)
+        limit = end if at_end else end - LOOKAHEAD
+        pos = 0
+        while pos < end:
+            match = TOKEN_PATTERN.match(buffer, pos)
+            if not match:
+                raise SyntaxError(f"Unexpected character {buffer[pos]} at position {offset + pos}")
+            if match.end() > limit:
+                break
+            kind = TokenType[match.lastgroup]
+            value = match.group()
+            if kind == TokenType.MISMATCH:
+                raise SyntaxError(f"Unexpected character {value} at position {offset + pos}")
+            elif kind == TokenType.FLOAT:
+                value = float(value)
+            elif kind == TokenType.NUMBER:
+                value = int(value)
+            elif kind == TokenType.CONSTANT:
+                value = 3.141592653589793 if value == 'pi' else 2.718281828459045
+            if kind != TokenType.SKIP and kind != TokenType.NEWLINE:
+                yield Token(kind, value, offset + pos)
+            pos = match.end()
+        buffer = buffer[pos:]
+        offset += pos
+
+@dataclass(frozen=True)
 class ASTNode:
     pass
 
-@dataclass
+@dataclass(frozen=True)
 class Number(ASTNode):
     value: Union[int, float]
 
-@dataclass
+@dataclass(frozen=True)
 class Variable(ASTNode):
     name: str
 
-@dataclass
+@dataclass(frozen=True)
 class Constant(ASTNode):
     value: float
 
-@dataclass
+@dataclass(frozen=True)
 class UnaryOp(ASTNode):
     op: str
     operand: ASTNode
 
-@dataclass
+@dataclass(frozen=True)
 class BinaryOp(ASTNode):
     left: ASTNode
     op: str
     right: ASTNode
 
-@dataclass
+@dataclass(frozen=True)
 class FunctionCall(ASTNode):
     name: str
     argument: ASTNode
 
+PRECEDENCES = {'=': 1, '+': 2, '-': 2, '*': 3, '/': 3, '^': 4}
+FUNCTION_TYPES = frozenset({TokenType.TRIG, TokenType.LOG})
+# Markers on the operator stack of Parser.parse_iterative, below every precedence.
+UNARY_MINUS = -1
+GROUP = -2
+
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: Union[List[Token], TokenBuffer]):
         self.tokens = tokens
         self.pos = 0
+        self.size = len(tokens)
+        if isinstance(tokens, TokenBuffer):
+            self.type_at = tokens.type_at
+            self.value_at = tokens.value_at
+            self.position_at = tokens.position_at
+        else:
+            self.type_at = lambda index: tokens[index].type
+            self.value_at = lambda index: tokens[index].value
+            self.position_at = lambda index: tokens[index].position
 
     def current(self) -> Optional[Token]:
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        return self.tokens[self.pos] if self.pos < self.size else None
+
+    def current_type(self) -> Optional[TokenType]:
+        return self.type_at(self.pos) if self.pos < self.size else None
 
     def consume(self, expected_type: TokenType = None, expected_value: str = None) -> Token:
         token = self.current()
@@ -119,67 +278,172 @@ class Parser:
         self.pos += 1
         return token
 
+    def expect(self, expected_type: TokenType) -> None:
+        token_type = self.current_type()
+        if token_type is None:
+            raise SyntaxError("Unexpected end of input")
+        if token_type != expected_type:
+            raise SyntaxError(f"Expected {expected_type.name} but got {token_type.name}")
+        self.pos += 1
+
     def parse(self) -> ASTNode:
         return self.expression()
 
+    def parse_iterative(self) -> ASTNode:
+        # Same grammar and trees as parse(), with explicit stacks instead of recursion,
+        # so neither long operator chains nor deep nesting hit the recursion limit.
+        # operators holds binary precedences and the UNARY_MINUS and GROUP markers, and
+        # details the matching operator, or the closing token and function of a group.
+        type_at, value_at = self.type_at, self.value_at
+        size = self.size
+        precedences = PRECEDENCES
+        operands = []
+        operators = []
+        details = []
+        pos = self.pos
+
+        while True:
+            # an operand: prefixes are pushed until an atom is found
+            token_type = type_at(pos) if pos < size else None
+            if token_type is None:
+                raise SyntaxError("Unexpected end of input")
+            if token_type == TokenType.OPERATOR and value_at(pos) == '-':
+                operators.append(UNARY_MINUS)
+                details.append(None)
+                pos += 1
+                continue
+            if token_type == TokenType.ABS:
+                operators.append(GROUP)
+                details.append((TokenType.ABS, None))
+                pos += 1
+                continue
+            if token_type == TokenType.LPAREN:
+                operators.append(GROUP)
+                details.append((TokenType.RPAREN, None))
+                pos += 1
+                continue
+            if token_type in FUNCTION_TYPES:
+                name = value_at(pos)
+                pos += 1
+                next_type = type_at(pos) if pos < size else None
+                if next_type is None:
+                    raise SyntaxError("Unexpected end of input")
+                if next_type != TokenType.LPAREN:
+                    raise SyntaxError(f"Expected {TokenType.LPAREN.name} but got {next_type.name}")
+                operators.append(GROUP)
+                details.append((TokenType.RPAREN, name))
+                pos += 1
+                continue
+            if token_type == TokenType.CONSTANT:
+                node = Constant(value=value_at(pos))
+            elif token_type == TokenType.FLOAT or token_type == TokenType.NUMBER:
+                node = Number(value=value_at(pos))
+            elif token_type == TokenType.IDENTIFIER:
+                node = Variable(name=value_at(pos))
+            else:
+                raise SyntaxError(f"Unexpected token {value_at(pos)} at position {self.position_at(pos)}")
+            pos += 1
+
+            while True:
+                # node is a finished primary: unary minuses in front of it apply first
+                while operators and operators[-1] == UNARY_MINUS:
+                    operators.pop()
+                    details.pop()
+                    node = UnaryOp(op='-', operand=node)
+                token_type = type_at(pos) if pos < size else None
+                if token_type == TokenType.OPERATOR:
+                    op = value_at(pos)
+                    precedence = precedences.get(op, 0)
+                    while operators and operators[-1] >= precedence:
+                        operators.pop()
+                        node = BinaryOp(left=operands.pop(), op=details.pop(), right=node)
+                    operands.append(node)
+                    operators.append(precedence)
+                    details.append(op)
+                    pos += 1
+                    break
+
+                # the expression ends here: fold the pending operators of this level
+                while operators and operators[-1] >= 0:
+                    operators.pop()
+                    node = BinaryOp(left=operands.pop(), op=details.pop(), right=node)
+                if not operators:
+                    self.pos = pos
+                    return node
+                closing, name = details.pop()
+                operators.pop()
+                if token_type is None:
+                    raise SyntaxError("Unexpected end of input")
+                if token_type != closing:
+                    raise SyntaxError(f"Expected {closing.name} but got {token_type.name}")
+                pos += 1
+                if closing == TokenType.ABS:
+                    node = UnaryOp(op='abs', operand=node)
+                elif name is not None:
+                    node = FunctionCall(name=name, argument=node)
+
     def expression(self, precedence=0) -> ASTNode:
         node = self.primary()
 
-        while self.current() and self.current().type == TokenType.OPERATOR:
-            op = self.current().value
+        while self.current_type() == TokenType.OPERATOR:
+            op = self.value_at(self.pos)
             op_precedence = self.get_precedence(op)
             if op_precedence < precedence:
                 break
-            self.consume(TokenType.OPERATOR)
+            self.pos += 1
             right = self.expression(op_precedence + 1)
             node = BinaryOp(left=node, op=op, right=right)
         return node
 
     def get_precedence(self, op: str) -> int:
-        precedences = {'=': 1, '+': 2, '-': 2, '*': 3, '/': 3, '^': 4}
-        return precedences.get(op, 0)
+        return PRECEDENCES.get(op, 0)
 
     def primary(self) -> ASTNode:
-        token = self.current()
+        token_type = self.current_type()
+        if token_type is None:
+            raise SyntaxError("Unexpected end of input")
 
-        if token.type == TokenType.OPERATOR and token.value == '-':
-            self.consume(TokenType.OPERATOR)
+        if token_type == TokenType.OPERATOR and self.value_at(self.pos) == '-':
+            self.pos += 1
             operand = self.primary()
             return UnaryOp(op='-', operand=operand)
 
-        if token.type == TokenType.ABS:
-            self.consume(TokenType.ABS)
+        if token_type == TokenType.ABS:
+            self.pos += 1
             expr = self.expression()
-            self.consume(TokenType.ABS)
+            self.expect(TokenType.ABS)
             return UnaryOp(op='abs', operand=expr)
 
-        if token.type == TokenType.LPAREN:
-            self.consume(TokenType.LPAREN)
+        if token_type == TokenType.LPAREN:
+            self.pos += 1
             expr = self.expression()
-            self.consume(TokenType.RPAREN)
+            self.expect(TokenType.RPAREN)
             return expr
 
-        if token.type in {TokenType.TRIG, TokenType.LOG}:
-            name = token.value
-            self.consume()
-            self.consume(TokenType.LPAREN)
+        if token_type in FUNCTION_TYPES:
+            name = self.value_at(self.pos)
+            self.pos += 1
+            self.expect(TokenType.LPAREN)
             arg = self.expression()
-            self.consume(TokenType.RPAREN)
+            self.expect(TokenType.RPAREN)
             return FunctionCall(name=name, argument=arg)
 
-        if token.type == TokenType.CONSTANT:
-            self.consume()
-            return Constant(value=token.value)
+        if token_type == TokenType.CONSTANT:
+            value = self.value_at(self.pos)
+            self.pos += 1
+            return Constant(value=value)
 
-        if token.type == TokenType.FLOAT or token.type == TokenType.NUMBER:
-            self.consume()
-            return Number(value=token.value)
+        if token_type == TokenType.FLOAT or token_type == TokenType.NUMBER:
+            value = self.value_at(self.pos)
+            self.pos += 1
+            return Number(value=value)
 
-        if token.type == TokenType.IDENTIFIER:
-            self.consume()
-            return Variable(name=token.value)
+        if token_type == TokenType.IDENTIFIER:
+            name = self.value_at(self.pos)
+            self.pos += 1
+            return Variable(name=name)
 
-        raise SyntaxError(f"Unexpected token {token.value} at position {token.position}")
+        raise SyntaxError(f"Unexpected token {self.value_at(self.pos)} at position {self.position_at(self.pos)}")
 
 def print_ast(node: ASTNode, indent: int = 0):
     prefix = '|   ' * indent + '|─' if indent > 0 else ''
@@ -203,19 +467,408 @@ def print_ast(node: ASTNode, indent: int = 0):
     else:
         print(f"{prefix}Unknown Node")
 
-code = "2 * 4 + 3 - x"
-tokens = tokenize(code)
-parser = Parser(tokens)
-ast = parser.parse()
-
-print("Abstract Syntax Tree 1:")
-print_ast(ast)
-
-print("\n")
-code = "x = |sin (pi / 2) + log (100)| + ln (e) + 2.1"
-tokens = tokenize(code)
-parser = Parser(tokens)
-ast = parser.parse()
+FUNCTIONS: Dict[str, Callable[[float], float]] = {
+    'sin': math.sin,
+    'cos': math.cos,
+    'tan': math.tan,
+    'csc': lambda x: 1 / math.sin(x),
+    'sec': lambda x: 1 / math.cos(x),
+    'cot': lambda x: 1 / math.tan(x),
+    'log': math.log10,
+    'ln': math.log,
+    'sqrt': math.sqrt,
+    'abs': abs,
+}
+# '=' only evaluates its right-hand side, so "y = f(x)" evaluates f(x) and y needs
+# no binding.
+BINARY_OPERATORS: Dict[str, Callable[[float, float], float]] = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '^': operator.pow,
+}
+SOURCE_OPERATORS = {'+': '+', '-': '-', '*': '*', '/': '/', '^': '**'}
+
+def evaluate(node: ASTNode, variables: Dict[str, float]) -> float:
+    # A value stack over _postorder(), so trees of any depth evaluate.
+    stack = []
+    for child in _postorder(node):
+        if isinstance(child, (Number, Constant)):
+            stack.append(child.value)
+        elif isinstance(child, Variable):
+            stack.append(variables[child.name])
+        elif isinstance(child, UnaryOp):
+            stack[-1] = -stack[-1] if child.op == '-' else abs(stack[-1])
+        elif isinstance(child, FunctionCall):
+            stack[-1] = FUNCTIONS[child.name](stack[-1])
+        elif isinstance(child, BinaryOp):
+            if child.op != '=':
+                right = stack.pop()
+                stack[-1] = BINARY_OPERATORS[child.op](stack[-1], right)
+        else:
+            raise ValueError(f"Cannot evaluate {type(child).__name__}")
+    return stack[-1]
+
+def _postorder(node: ASTNode, targets: bool = False) -> Iterator[ASTNode]:
+    # Children before parents without recursion, so deep trees compile too. The left
+    # side of '=' is never evaluated and only visited with targets=True.
+    stack = [(node, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            yield node
+        elif isinstance(node, BinaryOp) and node.op == '=' and not targets:
+            stack += ((node, True), (node.right, False))
+        elif isinstance(node, BinaryOp):
+            stack += ((node, True), (node.right, False), (node.left, False))
+        elif isinstance(node, UnaryOp):
+            stack += ((node, True), (node.operand, False))
+        elif isinstance(node, FunctionCall):
+            stack += ((node, True), (node.argument, False))
+        else:
+            yield node
+
+def _variable_names(node: ASTNode) -> Tuple[str, ...]:
+    names = {}
+    for child in _postorder(node):
+        if isinstance(child, Variable):
+            names[child.name] = None
+    return tuple(names)
+
+PUSH = 0
+LOAD = 1
+UNARY = 2
+BINARY = 3
+# Deeper trees are not turned into source: Python's parser rejects about 200 nested
+# parentheses, and postfix is as fast as compiled code long before that.
+SOURCE_DEPTH_LIMIT = 100
+
+class CompiledExpression:
+    # An AST compiled once for repeated evaluation. Variables are passed positionally
+    # in the order of .variables, either one row at a time or as a batch of rows.
+    # "bytecode" generates lambda source and compiles it with compile(), "postfix"
+    # lowers the tree to a flat instruction list run by a small stack machine. Trees
+    # deeper than SOURCE_DEPTH_LIMIT use postfix without generating any source.
+    def __init__(self, node: ASTNode, mode: str = 'bytecode'):
+        if mode not in ('bytecode', 'postfix'):
+            raise ValueError(f"Unknown compilation mode {mode}")
+        self.variables = _variable_names(node)
+        slots = {name: index for index, name in enumerate(self.variables)}
+        self.codes = array('B')
+        self.arguments = []
+        heights = []
+        for child in _postorder(node):
+            if isinstance(child, (Number, Constant)):
+                self.codes.append(PUSH)
+                self.arguments.append(child.value)
+                heights.append(1)
+            elif isinstance(child, Variable):
+                self.codes.append(LOAD)
+                self.arguments.append(slots[child.name])
+                heights.append(1)
+            elif isinstance(child, UnaryOp):
+                self.codes.append(UNARY)
+                self.arguments.append(operator.neg if child.op == '-' else abs)
+                heights[-1] += 1
+            elif isinstance(child, FunctionCall):
+                self.codes.append(UNARY)
+                self.arguments.append(FUNCTIONS[child.name])
+                heights[-1] += 1
+            elif child.op != '=':
+                self.codes.append(BINARY)
+                self.arguments.append(BINARY_OPERATORS[child.op])
+                right = heights.pop()
+                heights[-1] = max(heights[-1], right) + 1
+        self.depth = heights[-1]
+
+        self.mode = mode
+        self.function = None
+        if mode == 'bytecode' and self.depth > SOURCE_DEPTH_LIMIT:
+            self.mode = 'postfix'
+        elif mode == 'bytecode':
+            try:
+                self.function = self._compile_source(node)
+            except (SyntaxError, RecursionError, MemoryError):
+                self.mode = 'postfix'
+        if self.function is None:
+            self.function = self._run
+
+    def _compile_source(self, node: ASTNode) -> Callable[..., float]:
+        parameters = [f"_{index}" for index in range(len(self.variables))]
+        slots = dict(zip(self.variables, parameters))
+        namespace = {f"_{name}": function for name, function in FUNCTIONS.items()}
+        namespace['_abs'] = abs
+        # Tokens are emitted in order from an explicit stack and joined once.
+        parts = []
+        stack = [node]
+        while stack:
+            child = stack.pop()
+            if isinstance(child, str):
+                parts.append(child)
+            elif isinstance(child, (Number, Constant)):
+                parts.append(repr(child.value))
+            elif isinstance(child, Variable):
+                parts.append(slots[child.name])
+            elif isinstance(child, UnaryOp):
+                stack += (')', child.operand, '(-' if child.op == '-' else '_abs(')
+            elif isinstance(child, FunctionCall):
+                stack += (')', child.argument, f"_{child.name}(")
+            elif child.op == '=':
+                stack.append(child.right)
+            else:
+                stack += (')', child.right, f" {SOURCE_OPERATORS[child.op]} ", child.left, '(')
+        source = f"lambda {', '.join(parameters)}: {''.join(parts)}"
+        return eval(compile(source, '<expression>', 'eval'), namespace)
+
+    def _run(self, *values: float) -> float:
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for code, argument in zip(self.codes, self.arguments):
+            if code == PUSH:
+                push(argument)
+            elif code == LOAD:
+                push(values[argument])
+            elif code == UNARY:
+                stack[-1] = argument(stack[-1])
+            else:
+                right = pop()
+                stack[-1] = argument(stack[-1], right)
+        return stack[0]
+
+    def __call__(self, *values: float) -> float:
+        return self.function(*values)
+
+    def evaluate(self, variables: Dict[str, float]) -> float:
+        return self.function(*[variables[name] for name in self.variables])
+
+    def evaluate_many(self, rows: Iterable[Sequence[float]]) -> List[float]:
+        return list(starmap(self.function, rows))
+
+def compile_expression(node: ASTNode, mode: str = 'bytecode') -> CompiledExpression:
+    return CompiledExpression(node, mode)
+
+def _numpy_functions(np) -> Dict[str, Callable]:
+    return {
+        'sin': np.sin,
+        'cos': np.cos,
+        'tan': np.tan,
+        'csc': lambda x: np.reciprocal(np.sin(x)),
+        'sec': lambda x: np.reciprocal(np.cos(x)),
+        'cot': lambda x: np.reciprocal(np.tan(x)),
+        'log': np.log10,
+        'ln': np.log,
+        'sqrt': np.sqrt,
+        'abs': np.abs,
+    }
+
+def evaluate_columns(node: ASTNode, columns: Dict[str, object], chunk_size: Optional[int] = None, out=None):
+    # Evaluates the tree once over whole columns: each variable is bound to a 1-d array
+    # (or the path of a .npy file, opened memory-mapped) and every node becomes one NumPy
+    # operation. With chunk_size the rows are processed in slices written into out, so
+    # only a few chunk-sized temporaries are alive however long the columns are; out may
+    # itself be a memory-mapped array. Domain errors give nan or inf as NumPy does.
+    import numpy as np
+
+    functions = _numpy_functions(np)
+    binary = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.true_divide, '^': np.power}
+    steps = []
+    for child in _postorder(node):
+        if isinstance(child, (Number, Constant)):
+            steps.append((PUSH, float(child.value)))
+        elif isinstance(child, Variable):
+            steps.append((LOAD, child.name))
+        elif isinstance(child, UnaryOp):
+            steps.append((UNARY, np.negative if child.op == '-' else np.abs))
+        elif isinstance(child, FunctionCall):
+            steps.append((UNARY, functions[child.name]))
+        elif child.op != '=':
+            steps.append((BINARY, binary[child.op]))
+
+    arrays = {}
+    for name, column in columns.items():
+        if isinstance(column, (str, os.PathLike)):
+            column = np.load(column, mmap_mode='r')
+        arrays[name] = column
+    for name in _variable_names(node):
+        if name not in arrays:
+            raise KeyError(name)
+    lengths = {len(column) for column in arrays.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length")
+    length = lengths.pop() if lengths else (len(out) if out is not None else 1)
+    if out is None:
+        out = np.empty(length, dtype=np.float64)
+    chunk_size = chunk_size or length or 1
+
+    with np.errstate(all='ignore'):
+        for start in range(0, length, chunk_size):
+            stop = min(start + chunk_size, length)
+            out[start:stop] = _run_columns(np, steps, arrays, start, stop)
+    return out
+
+def _run_columns(np, steps, arrays, start: int, stop: int):
+    # The stack holds (value, owned): scalars and temporaries this chunk created can be
+    # overwritten in place, slices of the input columns cannot.
+    stack = []
+    for code, argument in steps:
+        if code == PUSH:
+            stack.append((argument, True))
+        elif code == LOAD:
+            column = np.asarray(arrays[argument][start:stop], dtype=np.float64)
+            stack.append((column, False))
+        elif code == UNARY:
+            value, owned = stack[-1]
+            if owned and isinstance(value, np.ndarray) and isinstance(argument, np.ufunc):
+                stack[-1] = (argument(value, out=value), True)
+            else:
+                stack[-1] = (argument(value), True)
+        else:
+            right, right_owned = stack.pop()
+            left, left_owned = stack[-1]
+            if left_owned and isinstance(left, np.ndarray):
+                stack[-1] = (argument(left, right, out=left), True)
+            elif right_owned and isinstance(right, np.ndarray):
+                stack[-1] = (argument(left, right, out=right), True)
+            else:
+                stack[-1] = (argument(left, right), True)
+    return stack[0][0]
+
+def _flatten(node: ASTNode) -> List[tuple]:
+    # A tree as postfix records, which pickle without recursing however deep it is.
+    records = []
+    for child in _postorder(node, targets=True):
+        if isinstance(child, Number):
+            records.append(('N', child.value))
+        elif isinstance(child, Constant):
+            records.append(('C', child.value))
+        elif isinstance(child, Variable):
+            records.append(('V', child.name))
+        elif isinstance(child, UnaryOp):
+            records.append(('U', child.op))
+        elif isinstance(child, FunctionCall):
+            records.append(('F', child.name))
+        else:
+            records.append(('B', child.op))
+    return records
+
+def _rebuild(records: List[tuple]) -> ASTNode:
+    stack = []
+    for kind, value in records:
+        if kind == 'N':
+            stack.append(Number(value=value))
+        elif kind == 'C':
+            stack.append(Constant(value=value))
+        elif kind == 'V':
+            stack.append(Variable(name=value))
+        elif kind == 'U':
+            stack.append(UnaryOp(op=value, operand=stack.pop()))
+        elif kind == 'F':
+            stack.append(FunctionCall(name=value, argument=stack.pop()))
+        else:
+            right = stack.pop()
+            stack.append(BinaryOp(left=stack.pop(), op=value, right=right))
+    return stack[0]
+
+class ParseCache:
+    # Parsed trees keyed by their token texts joined with single spaces, so sources
+    # that differ only in the whitespace tokenize() skips share an entry. Trees are
+    # frozen, so a hit returns the cached tree itself. The least recently used entries
+    # are evicted once there are more than max_entries of them or more than max_nodes
+    # nodes in total. With a path, save() writes the entries there and a new cache on
+    # the same path starts with them instead of reparsing.
+    def __init__(self, max_entries: int = 4096, max_nodes: int = 1 << 20, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_nodes = max_nodes
+        self.path = path
+        self.entries: 'OrderedDict[str, Tuple[ASTNode, int]]' = OrderedDict()
+        self.nodes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def normalize(source: str) -> str:
+        # findall() steps over anything that is not a token, so unless the tokens and
+        # the spaces, tabs and newlines cover the whole source, tokenize() would reject
+        # it and is called to raise the same SyntaxError.
+        texts = TOKEN_TEXT.findall(source)
+        key = ' '.join(texts)
+        skipped = source.count(' ') + source.count('\t') + source.count('\n')
+        if len(key) - max(len(texts) - 1, 0) + skipped != len(source):
+            tokenize(source)
+        return key
+
+    def parse(self, source: str) -> ASTNode:
+        key = self.normalize(source)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+        self.misses += 1
+        node = Parser(tokenize(source)).parse_iterative()
+        self._store(key, node, sum(1 for _ in _postorder(node, targets=True)))
+        return node
 
-print("Abstract Syntax Tree 2:")
-print_ast(ast)
\ No newline at end of file
+    def _store(self, key: str, node: ASTNode, size: int):
+        if size > self.max_nodes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.nodes -= old[1]
+        self.entries[key] = (node, size)
+        self.nodes += size
+        while len(self.entries) > self.max_entries or self.nodes > self.max_nodes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.nodes -= evicted
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'nodes': self.nodes,
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.nodes = 0
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        records = [(key, _flatten(node)) for key, (node, _) in self.entries.items()]
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as file:
+            pickle.dump(records, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    def load(self, path: Optional[str] = None):
+        # Entries are stored least recently used first, so the order survives a reload.
+        with open(path or self.path, 'rb') as file:
+            records = pickle.load(file)
+        for key, flat in records:
+            self._store(key, _rebuild(flat), len(flat))
+
+if __name__ == "__main__":
+    code = "2 * 4 + 3 - x"
+    tokens = tokenize(code)
+    parser = Parser(tokens)
+    ast = parser.parse()
+
+    print("Abstract Syntax Tree 1:")
+    print_ast(ast)
+
+    print("\n")
+    code = "x = |sin (pi / 2) + log (100)| + ln (e) + 2.1"
+    tokens = tokenize(code)
+    parser = Parser(tokens)
+    ast = parser.parse()
+
+    print("Abstract Syntax Tree 2:")
+    print_ast(ast)
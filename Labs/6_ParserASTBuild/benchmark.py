@@ -0,0 +1,207 @@
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+from Lab6 import TOKEN_REGEX, Parser, Token, TokenType, ParseCache, compile_expression, evaluate, evaluate_columns, tokenize, tokenize_compact
+
+SAMPLE = "x = |sin (pi / 2) + log (100)| + ln (e) + 2.1 * y ^ 3 - sqrt (4)\n"
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000]
+# The sliced tokenizer is quadratic, past this size it would run for hours.
+SLICED_LIMIT = 100_000
+
+def tokenize_sliced(code):
+    # The original tokenizer: re.match on code[i:] copies the rest of the input per token.
+    tokens = []
+    i = 0
+    while i < len(code):
+        match = re.match(TOKEN_REGEX, code[i:])
+        kind = TokenType[match.lastgroup]
+        value = match.group()
+        if kind == TokenType.SKIP or kind == TokenType.NEWLINE:
+            i += len(value)
+            continue
+        elif kind == TokenType.FLOAT:
+            value = float(value)
+        elif kind == TokenType.NUMBER:
+            value = int(value)
+        elif kind == TokenType.CONSTANT:
+            value = 3.141592653589793 if value == 'pi' else 2.718281828459045
+        tokens.append(Token(kind, value, i))
+        i += len(match.group())
+    return tokens
+
+def make_input(size):
+    return (SAMPLE * (size // len(SAMPLE) + 1))[:size]
+
+def throughput(function, code):
+    start = time.perf_counter()
+    count = len(function(code))
+    elapsed = time.perf_counter() - start
+    return count, count / elapsed
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1000:
+            return f"{size} {unit}"
+        size //= 1000
+    return f"{size} GB"
+
+def timed_parse(parse):
+    start = time.perf_counter()
+    try:
+        parse()
+    except RecursionError:
+        return None
+    return time.perf_counter() - start
+
+def parse_throughput(max_tokens):
+    print(f"\n{'input':>15} {'tokens':>10} {'recursive tok/s':>16} {'iterative tok/s':>16}")
+    term = "2.1 * y ^ 3 - sin (x) + |z| / "
+    for count in (10_000, 100_000, 1_000_000):
+        if count > max_tokens:
+            break
+        nested = count // 3
+        for label, code in (("chain", term * (count // 14) + "x"),
+                            (f"nesting {nested:,}", "-(" * nested + "x" + ")" * nested)):
+            tokens = tokenize(code)
+            recursive = timed_parse(Parser(tokens).parse)
+            iterative = timed_parse(Parser(tokens).parse_iterative)
+            before = f"{len(tokens) / recursive:,.0f}" if recursive is not None else "RecursionError"
+            print(f"{label:>15} {len(tokens):>10,} {before:>16} {len(tokens) / iterative:>16,.0f}")
+
+FORMULA = "y = |sin (x / 2) + log (z + 100)| * ln (e + x ^ 2) - sqrt (z) / 2.5"
+
+def evaluation_throughput(max_rows):
+    ast = Parser(tokenize(FORMULA)).parse()
+    print(f"\n{'rows':>10} {'tree walk rows/s':>17} {'postfix rows/s':>15} {'bytecode rows/s':>16}")
+    for count in (10_000, 100_000, 1_000_000):
+        if count > max_rows:
+            break
+        postfix = compile_expression(ast, 'postfix')
+        bytecode = compile_expression(ast, 'bytecode')
+        rows = [(i % 7 - 3.0, i % 11 + 1.0) for i in range(count)]
+        bindings = [dict(zip(bytecode.variables, row)) for row in rows]
+        start = time.perf_counter()
+        expected = [evaluate(ast, variables) for variables in bindings]
+        walk = time.perf_counter() - start
+        rates = []
+        for compiled in (postfix, bytecode):
+            start = time.perf_counter()
+            assert compiled.evaluate_many(rows) == expected
+            rates.append(count / (time.perf_counter() - start))
+        print(f"{count:>10,} {count / walk:>17,.0f} {rates[0]:>15,.0f} {rates[1]:>16,.0f}")
+
+def deep_compilation(max_terms):
+    # x + x + ... + x nests to the left, one level per term, far past what Python's
+    # compiler accepts, so bytecode mode has to settle on postfix up front.
+    print(f"\n{'terms':>10} {'tree walk s':>12} {'postfix s':>10} {'bytecode s':>11} {'mode':>9}")
+    for terms in (100, 10_000, 100_000, 300_000):
+        if terms > max_terms:
+            break
+        ast = Parser(tokenize(" + ".join(["x"] * terms))).parse_iterative()
+        start = time.perf_counter()
+        expected = evaluate(ast, {'x': 1.0})
+        walk = time.perf_counter() - start
+        times = []
+        for mode in ('postfix', 'bytecode'):
+            start = time.perf_counter()
+            compiled = compile_expression(ast, mode)
+            assert compiled(1.0) == expected == terms
+            times.append(time.perf_counter() - start)
+        print(f"{terms:>10,} {walk:>12.3f} {times[0]:>10.3f} {times[1]:>11.3f} {compiled.mode:>9}")
+
+def column_throughput(max_rows):
+    try:
+        import numpy as np
+    except ImportError:
+        print("numpy is not installed, skipping evaluate_columns")
+        return
+    ast = Parser(tokenize(FORMULA)).parse()
+    compiled = compile_expression(ast)
+    print(f"\n{'rows':>12} {'bytecode rows/s':>16} {'numpy rows/s':>14} {'chunked .npy rows/s':>20}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (100_000, 1_000_000, 10_000_000):
+            if count > max_rows:
+                break
+            x = np.arange(count, dtype=np.float64) % 7 - 3
+            z = np.arange(count, dtype=np.float64) % 11 + 1
+            before = "-"
+            if count <= 1_000_000:
+                start = time.perf_counter()
+                compiled.evaluate_many(zip(x.tolist(), z.tolist()))
+                before = f"{count / (time.perf_counter() - start):,.0f}"
+            start = time.perf_counter()
+            result = evaluate_columns(ast, {'x': x, 'z': z})
+            vectorized = count / (time.perf_counter() - start)
+
+            paths = {name: os.path.join(directory, f"{name}.npy") for name in ('x', 'z', 'out')}
+            np.save(paths['x'], x)
+            np.save(paths['z'], z)
+            out = np.lib.format.open_memmap(paths['out'], mode='w+', dtype=np.float64, shape=(count,))
+            start = time.perf_counter()
+            evaluate_columns(ast, {'x': paths['x'], 'z': paths['z']}, chunk_size=1 << 20, out=out)
+            out.flush()
+            chunked = count / (time.perf_counter() - start)
+            assert np.allclose(out, result, equal_nan=True)
+            del out
+            print(f"{count:>12,} {before:>16} {vectorized:>14,.0f} {chunked:>20,.0f}")
+
+def cache_throughput(formulas=5_000, lookups=200_000):
+    rng = random.Random(0)
+    sources = [f"{rng.choice(['x', 'y', '2'])} * sin (x / {i}) + |y - {i % 97}| ^ 2 - log ({i} + z)" for i in range(formulas)]
+    # a skewed workload: a few formulas recur far more often than the rest
+    workload = [sources[min(int(rng.paretovariate(1.2)) - 1, formulas - 1)] for _ in range(lookups)]
+    print(f"\n{lookups:,} lookups over {formulas:,} formulas")
+
+    start = time.perf_counter()
+    for source in workload:
+        Parser(tokenize(source)).parse()
+    uncached = time.perf_counter() - start
+    print(f"{'tokenize + parse':<24} {uncached:8.3f} s")
+    for max_entries in (100, 1_000, 10_000):
+        cache = ParseCache(max_entries=max_entries)
+        start = time.perf_counter()
+        for source in workload:
+            cache.parse(source)
+        elapsed = time.perf_counter() - start
+        stats = cache.stats()
+        print(f"{f'ParseCache({max_entries:,})':<24} {elapsed:8.3f} s  hits {stats['hits']:,}  misses {stats['misses']:,}  evictions {stats['evictions']:,}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "formulas.cache")
+        cache = ParseCache(max_entries=formulas, path=path)
+        start = time.perf_counter()
+        for source in sources:
+            cache.parse(source)
+        cold = time.perf_counter() - start
+        cache.save()
+        start = time.perf_counter()
+        warm = ParseCache(max_entries=formulas, path=path)
+        for source in sources:
+            warm.parse(source)
+        loaded = time.perf_counter() - start
+        assert warm.misses == 0
+        print(f"{'cold start':<24} {cold:8.3f} s, warm start from {os.path.getsize(path) // 1024:,} KB: {loaded:.3f} s")
+
+def main():
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    print(f"{'input':>8} {'tokens':>10} {'sliced tok/s':>14} {'compiled tok/s':>16} {'compact tok/s':>15}")
+    for size in SIZES:
+        if size > max_size:
+            break
+        code = make_input(size)
+        count, after = throughput(tokenize, code)
+        compact = throughput(tokenize_compact, code)[1]
+        before = f"{throughput(tokenize_sliced, code)[1]:,.0f}" if size <= SLICED_LIMIT else "-"
+        print(f"{format_size(size):>8} {count:>10,} {before:>14} {after:>16,.0f} {compact:>15,.0f}")
+    parse_throughput(max_size // 10)
+    evaluation_throughput(max_size // 10)
+    deep_compilation(max_size // 10)
+    column_throughput(max_size)
+    cache_throughput()
+
+if __name__ == "__main__":
+    main()